@@ -0,0 +1,167 @@
+"""
+Checkpoint size benchmark: per-turn bytes stored for full-Document vs slim state
+
+Usage (from the backend directory):
+    python benchmarks/checkpoint_size.py [--turns 10]
+
+Indexes a sample paper with the hashing embeddings stub from
+benchmarks/retrieval.py and asks its questions in one conversation, running
+the compiled graph on a MemorySaver with a stub chat model. The legacy layout
+is the graph as it was before slim checkpoints: retrieve stores full
+Documents, there is no finalize_turn node and every step is checkpointed
+(durability="sync"). The slim layout is create_graph() invoked with
+CHECKPOINT_DURABILITY. The reported size is everything the checkpointer
+stores (checkpoints, channel blobs and pending writes) added by each turn.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph, START, END
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import graph.chains  # noqa: E402
+import graph.llm  # noqa: E402
+import graph.preprocess  # noqa: E402
+from graph.config import CHECKPOINT_DURABILITY, ensure_directories  # noqa: E402
+from graph.edges import on_topic_router  # noqa: E402
+from graph.graph import create_graph  # noqa: E402
+from graph.helpers import retrieve_documents  # noqa: E402
+from graph.nodes import question_rewriter, question_classifier, off_topic_response, _embeddings_path  # noqa: E402
+from graph.scheduler import get_scheduler  # noqa: E402
+from models import AgentState  # noqa: E402
+from retrieval import DATA_DIR, HashingEmbeddings  # noqa: E402
+
+PDF = "sparse_attention.pdf"
+
+
+def stub_chat_model():
+    """Answers "yes" to the classifier and a fixed-length answer to everything else"""
+    def respond(prompt):
+        if "classifier" in str(prompt):
+            return AIMessage(content="yes")
+        return AIMessage(content="An answer of typical length. " * 20)
+
+    return graph.llm.ScheduledChatModel(RunnableLambda(respond), get_scheduler("stub-chat", 1))
+
+
+def stub_embedding_function():
+    return graph.llm.CoalescingEmbeddings(HashingEmbeddings(), "stub-embeddings", get_scheduler("stub-embeddings", 2))
+
+
+def legacy_retrieve(state: AgentState, config: RunnableConfig):
+    """retrieve as it was before slim checkpoints: full Documents in state"""
+    results = retrieve_documents(_embeddings_path(config), state["rephrased_question"])
+    state["documents"] = [doc for doc, _ in results]
+    return state
+
+
+def legacy_generate_answer(state: AgentState):
+    """generate_answer as it was before slim checkpoints: context read straight from state"""
+    response = graph.chains.generate_answer_chain().invoke({
+        "history": state["messages"][:-1],
+        "context": state["documents"],
+        "question": state["rephrased_question"]
+    })
+    state["messages"].append(AIMessage(content=response.content.strip()))
+    return state
+
+
+def create_legacy_graph(checkpointer):
+    workflow = StateGraph(AgentState)
+    workflow.add_node("question_rewriter", question_rewriter)
+    workflow.add_node("question_classifier", question_classifier)
+    workflow.add_node("off_topic_response", off_topic_response)
+    workflow.add_node("retrieve", legacy_retrieve)
+    workflow.add_node("generate_answer", legacy_generate_answer)
+    workflow.add_edge(START, "question_rewriter")
+    workflow.add_edge("question_rewriter", "question_classifier")
+    workflow.add_conditional_edges(
+        "question_classifier",
+        on_topic_router,
+        {"retrieve": "retrieve", "off_topic_response": "off_topic_response"}
+    )
+    workflow.add_edge("retrieve", "generate_answer")
+    workflow.add_edge("generate_answer", END)
+    workflow.add_edge("off_topic_response", END)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def stored_bytes(value) -> int:
+    """Total size of the serialized payloads held in a checkpointer's storage"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(stored_bytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(stored_bytes(item) for item in value)
+    return 0
+
+
+def saver_bytes(saver: MemorySaver) -> int:
+    return stored_bytes(saver.storage) + stored_bytes(saver.blobs) + stored_bytes(saver.writes)
+
+
+def run_turn(compiled, saver: MemorySaver, question: str, config: dict, durability: str) -> int:
+    """Run one turn and return the bytes it added to the checkpointer"""
+    before = saver_bytes(saver)
+    compiled.invoke({
+        "question": HumanMessage(content=question),
+        "documents": [],
+        "on_topic": "",
+        "rephrased_question": "",
+        "proceed_to_generate": False,
+        "rephrase_count": 0
+    }, config=config, durability=durability)
+    return saver_bytes(saver) - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-turn checkpoint bytes")
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+
+    graph.chains.get_chat_model = stub_chat_model
+    graph.llm.get_embedding_function = stub_embedding_function
+    graph.preprocess.get_embedding_function = stub_embedding_function
+
+    with open(DATA_DIR / "qa.jsonl", encoding="utf-8") as f:
+        questions = [item["question"] for item in map(json.loads, f) if item["pdf"] == PDF]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # The index is built under the relative EMBEDDINGS_DIR
+        os.chdir(workdir)
+        ensure_directories()
+        chunks = graph.preprocess.split_text(graph.preprocess.load_pdf_text(str(DATA_DIR / PDF)))
+        version = graph.preprocess.create_embeddings(chunks)
+        config = {"configurable": {"thread_id": "benchmark", "index_version": version}}
+
+        legacy_graph = create_legacy_graph(legacy_saver := MemorySaver())
+        slim_graph = create_graph()
+        slim_saver = slim_graph.checkpointer
+
+        legacy_total = slim_total = 0
+        rows = []
+        for turn in range(1, args.turns + 1):
+            question = questions[(turn - 1) % len(questions)]
+            legacy = run_turn(legacy_graph, legacy_saver, question, config, "sync")
+            slim = run_turn(slim_graph, slim_saver, question, config, CHECKPOINT_DURABILITY)
+            legacy_total += legacy
+            slim_total += slim
+            rows.append((turn, legacy, slim))
+
+    print(f"{'turn':>5}{'legacy (B)':>14}{'slim (B)':>12}{'reduction':>11}")
+    for turn, legacy, slim in rows:
+        print(f"{turn:>5}{legacy:>14}{slim:>12}{1 - slim / legacy:>10.0%}")
+    print(f"total{legacy_total:>14}{slim_total:>12}{1 - slim_total / legacy_total:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Regenerate the bundled sample PDFs in benchmarks/data from their Markdown sources
+
+Usage (from the backend directory):
+    python benchmarks/make_sample_pdfs.py
+
+Writes plain single-font PDFs with the standard library only, so the samples
+can be rebuilt without extra dependencies. Markdown header markers are kept
+in the text so the header splitter sees the same structure as in the source.
+"""
+
+import textwrap
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+FONT_SIZE = 10
+LEADING = 13
+MARGIN = 54
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+LINE_CHARS = 95
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+
+
+def wrap_markdown(text: str) -> list:
+    """Wrap Markdown paragraphs into PDF text lines"""
+    lines = []
+    for paragraph in text.split("\n\n"):
+        paragraph = " ".join(paragraph.split())
+        if paragraph:
+            lines.extend(textwrap.wrap(paragraph, LINE_CHARS))
+            lines.append("")
+    return lines
+
+
+def escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(lines: list, path: Path):
+    """Write text lines to a minimal multi-page PDF"""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and content stream per page
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    page_ids = []
+    for index, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * index, 5 + 2 * index
+        page_ids.append(page_id)
+        commands = [f"BT /F1 {FONT_SIZE} Tf {LEADING} TL {MARGIN} {PAGE_HEIGHT - MARGIN} Td"]
+        commands += [f"({escape(line)}) Tj T*" for line in page_lines]
+        commands.append("ET")
+        stream = "\n".join(commands).encode("latin-1")
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode("latin-1")
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[2] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (object_id, objects[object_id])
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for object_id in sorted(objects):
+        out += b"%010d 00000 n \n" % offsets[object_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def main():
+    for source in sorted(DATA_DIR.glob("*.md")):
+        target = source.with_suffix(".pdf")
+        write_pdf(wrap_markdown(source.read_text(encoding="utf-8")), target)
+        print(f"Wrote {target.name}")
+
+
+if __name__ == "__main__":
+    main()
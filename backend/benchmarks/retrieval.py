@@ -0,0 +1,174 @@
+"""
+Chunking and retrieval configuration benchmark
+
+Usage (from the backend directory):
+    python benchmarks/retrieval.py [--chunk-sizes 256 512 1024] [--overlaps 0 80 160]
+                                   [--ks 2 4 8] [--search-types similarity mmr]
+                                   [--embeddings hashing|ollama] [--json results.json]
+
+Sweeps CHUNK_SIZE, CHUNK_OVERLAP, RETRIEVAL_K and RETRIEVAL_TYPE over the
+sample papers and question/expected-passage pairs in benchmarks/data. For
+each setting it reports index build time, index size on disk, median query
+latency, recall@k (share of questions whose expected passage appears in a
+retrieved chunk) and approximate prompt tokens per question.
+
+The default "hashing" embeddings are a deterministic bag-of-words stub, so
+results are reproducible offline; "ollama" uses the configured embedding model.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from graph.config import CHUNK_SIZE, CHUNK_OVERLAP, RETRIEVAL_K, RETRIEVAL_TYPE  # noqa: E402
+from graph.helpers import search_vectorstore  # noqa: E402
+from graph.preprocess import load_pdf_text, split_text  # noqa: E402
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+# Rough average for English text with LLaMA-style tokenizers
+CHARS_PER_TOKEN = 4
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic feature-hashing embeddings over words and word bigrams"""
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        vector = [0.0] * self.dimensions
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.md5(feature.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def load_questions() -> dict:
+    """Question/expected-passage pairs grouped by PDF"""
+    by_pdf = {}
+    with open(DATA_DIR / "qa.jsonl", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                by_pdf.setdefault(item["pdf"], []).append(item)
+    return by_pdf
+
+
+def build(texts: dict, embeddings: Embeddings, chunk_size: int, chunk_overlap: int, workdir: Path) -> dict:
+    """Chunk and index every paper with one splitter setting"""
+    started = time.perf_counter()
+    stores = {}
+    for pdf, text in texts.items():
+        chunks = split_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        stores[pdf] = FAISS.from_documents(chunks, embeddings)
+    build_seconds = time.perf_counter() - started
+
+    index_bytes = 0
+    for pdf, db in stores.items():
+        path = workdir / f"{Path(pdf).stem}_{chunk_size}_{chunk_overlap}"
+        db.save_local(str(path))
+        index_bytes += sum(f.stat().st_size for f in path.iterdir())
+    return {"stores": stores, "build_seconds": build_seconds, "index_bytes": index_bytes}
+
+
+def evaluate(stores: dict, questions: dict, k: int, search_type: str) -> dict:
+    """Run every question against its paper's index"""
+    latencies, hits, prompt_tokens = [], 0, []
+    for pdf, items in questions.items():
+        for item in items:
+            started = time.perf_counter()
+            results = search_vectorstore(stores[pdf], item["question"], k=k, search_type=search_type)
+            latencies.append(time.perf_counter() - started)
+
+            documents = [doc for doc, _ in results]
+            expected = normalize(item["expected"])
+            hits += any(expected in normalize(doc.page_content) for doc in documents)
+            # generate_answer renders the Document list and the question into the prompt
+            prompt_tokens.append((len(str(documents)) + len(item["question"])) / CHARS_PER_TOKEN)
+    return {
+        "query_ms": statistics.median(latencies) * 1000,
+        "recall": hits / len(latencies),
+        "prompt_tokens": statistics.mean(prompt_tokens),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep chunking and retrieval settings")
+    parser.add_argument("--chunk-sizes", nargs="+", type=int, default=[256, CHUNK_SIZE, 1024])
+    parser.add_argument("--overlaps", nargs="+", type=int, default=[0, CHUNK_OVERLAP, 160])
+    parser.add_argument("--ks", nargs="+", type=int, default=[2, RETRIEVAL_K, 8])
+    parser.add_argument("--search-types", nargs="+", default=["similarity", "mmr"])
+    parser.add_argument("--embeddings", choices=["hashing", "ollama"], default="hashing")
+    parser.add_argument("--json", type=Path, help="Also write results to this file")
+    args = parser.parse_args()
+
+    if args.embeddings == "ollama":
+        from graph.llm import get_embedding_function
+        embeddings = get_embedding_function()
+    else:
+        embeddings = HashingEmbeddings()
+
+    questions = load_questions()
+    texts = {pdf: load_pdf_text(str(DATA_DIR / pdf)) for pdf in questions}
+
+    rows = []
+    print(f"{'size':>5}{'overlap':>8}{'k':>3} {'type':<11}{'build (s)':>10}{'index (KB)':>11}"
+          f"{'query (ms)':>11}{'recall@k':>9}{'prompt tok':>11}")
+    with tempfile.TemporaryDirectory() as workdir:
+        # Discarded run so one-time library initialization doesn't count as build time
+        build(texts, embeddings, CHUNK_SIZE, CHUNK_OVERLAP, Path(workdir))
+        for chunk_size in args.chunk_sizes:
+            for chunk_overlap in args.overlaps:
+                if chunk_overlap >= chunk_size:
+                    continue
+                built = build(texts, embeddings, chunk_size, chunk_overlap, Path(workdir))
+                for k in args.ks:
+                    for search_type in args.search_types:
+                        row = {
+                            "chunk_size": chunk_size,
+                            "chunk_overlap": chunk_overlap,
+                            "k": k,
+                            "search_type": search_type,
+                            "build_seconds": built["build_seconds"],
+                            "index_bytes": built["index_bytes"],
+                            **evaluate(built["stores"], questions, k, search_type),
+                        }
+                        rows.append(row)
+                        marker = " *" if (chunk_size, chunk_overlap, k, search_type) == (
+                            CHUNK_SIZE, CHUNK_OVERLAP, RETRIEVAL_K, RETRIEVAL_TYPE) else ""
+                        print(f"{chunk_size:>5}{chunk_overlap:>8}{k:>3} {search_type:<11}"
+                              f"{row['build_seconds']:>10.3f}{row['index_bytes'] / 1024:>11.1f}"
+                              f"{row['query_ms']:>11.2f}{row['recall']:>9.2f}{row['prompt_tokens']:>11.0f}{marker}")
+    print("* current configuration")
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
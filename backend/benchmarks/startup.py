@@ -0,0 +1,99 @@
+"""
+Startup benchmark: time-to-ready and baseline RSS for each startup mode
+
+Usage (from the backend directory):
+    python benchmarks/startup.py [--runs 5] [--modes background lazy eager] [--timeout 300]
+
+Each run starts a fresh interpreter in a scratch directory and imports the
+app. Baseline RSS is the peak resident set size at that point, before the
+lifespan hook starts any warm-up. The app is then started and
+/health?ready=true is polled: "serving" is the time to the first response,
+"ready" the time until it answers 200 (imports done and both models loaded in Ollama,
+so Ollama must be running for background and eager mode). Lazy mode reports
+ready immediately and pays those costs on the first request instead.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Runs inside the child interpreter; argv[1] is the readiness timeout in seconds
+PROBE = """
+import json, resource, sys, time
+timeout = float(sys.argv[1])
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    status = client.get("/health?ready=true").status_code
+    serving = time.perf_counter()
+    while status != 200 and time.perf_counter() - started < timeout:
+        time.sleep(0.05)
+        status = client.get("/health?ready=true").status_code
+    ready = time.perf_counter() if status == 200 else None
+    ready_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "import_seconds": imported - started,
+    "serving_seconds": serving - started,
+    "ready_seconds": ready - started if ready is not None else None,
+    "baseline_rss_mb": baseline_kb / 1024,
+    "ready_rss_mb": ready_kb / 1024,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def run_once(mode: str, timeout: float) -> dict:
+    """Start the app once in a fresh interpreter and return its measurements"""
+    env = dict(os.environ, RAG_STARTUP_MODE=mode, PYTHONPATH=str(BACKEND_DIR))
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE, str(timeout)],
+            cwd=workdir, env=env, capture_output=True, text=True
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup failed in {mode} mode:\n{result.stderr}")
+    # The app prints progress messages; the measurements are the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def median(values):
+    values = [value for value in values if value is not None]
+    return statistics.median(values) if values else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure server time-to-ready and baseline RSS")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=["background", "lazy", "eager"])
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for /health?ready=true")
+    args = parser.parse_args()
+
+    print(f"{'mode':<12}{'import (s)':>12}{'serving (s)':>13}{'ready (s)':>11}"
+          f"{'base RSS (MB)':>15}{'ready RSS (MB)':>16}{'modules':>9}")
+    for mode in args.modes:
+        results = [run_once(mode, args.timeout) for _ in range(args.runs)]
+        not_ready = sum(r["ready_seconds"] is None for r in results)
+        print(
+            f"{mode:<12}"
+            f"{median(r['import_seconds'] for r in results):>12.3f}"
+            f"{median(r['serving_seconds'] for r in results):>13.3f}"
+            f"{median(r['ready_seconds'] for r in results):>11.3f}"
+            f"{median(r['baseline_rss_mb'] for r in results):>15.1f}"
+            f"{median(r['ready_rss_mb'] for r in results):>16.1f}"
+            f"{median(r['modules'] for r in results):>9.0f}"
+            + (f"  ({not_ready} run(s) not ready within {args.timeout:.0f}s)" if not_ready else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Offline bulk Q&A runner over the RAG graph
+
+Usage (from the backend directory):
+    python bulk_qa.py --questions questions.jsonl --output answers.jsonl [--pdf paper.pdf] [--parallel 2]
+
+Each input line is a JSON object with a "question" and an optional "id"
+(defaults to the line number). Each output line records the answer, sources
+and timing for one question. Questions already answered in the output file
+are skipped, so an interrupted run can be resumed with the same command: a
+resumed run answers against the index version recorded in the output (without
+re-ingesting --pdf), and refuses to continue if that version is gone.
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from pathlib import Path
+from langchain_core.messages import HumanMessage
+from graph.config import ensure_directories, CHECKPOINT_DURABILITY
+from graph.helpers import format_source_documents
+from graph.preprocess import build_index
+from graph.graph import create_graph
+from graph.index_store import publish_version, pinned_version, version_path
+from graph.scheduler import Priority, priority_scope
+
+
+def load_questions(path: Path) -> list:
+    """Read questions from a JSONL file"""
+    questions = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            questions.append({
+                "id": str(item.get("id", line_number)),
+                "question": item["question"]
+            })
+    return questions
+
+
+def load_completed(path: Path):
+    """Return ids already answered successfully in an existing output file, and the index versions used"""
+    completed, versions = set(), set()
+    if not path.exists():
+        return completed, versions
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run
+                continue
+            versions.add(record.get("index_version"))
+            if not record.get("error"):
+                completed.add(str(record["id"]))
+    return completed, versions
+
+
+def answer_question(graph, item: dict, index_version: str) -> dict:
+    """Run one question through the graph on its own thread"""
+    config = {
+        "configurable": {
+            "thread_id": f"bulk_{item['id']}",
+            "index_version": index_version
+        }
+    }
+    initial_state = {
+        "question": HumanMessage(content=item["question"]),
+        "documents": [],
+        "on_topic": "",
+        "rephrased_question": "",
+        "proceed_to_generate": False,
+        "rephrase_count": 0
+    }
+
+    started = time.perf_counter()
+    record = {"id": item["id"], "question": item["question"], "index_version": index_version}
+    try:
+        with priority_scope(Priority.BATCH):
+            result = graph.invoke(initial_state, config=config, durability=CHECKPOINT_DURABILITY)
+        record["answer"] = result["messages"][-1].content if result["messages"] else ""
+        record["sources"] = format_source_documents(str(version_path(index_version)), result.get("documents"))
+    except Exception as e:
+        record["error"] = str(e)
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def resume_version(parser, versions: set):
+    """The index version an existing output file was answered against, or None for a new file"""
+    if not versions:
+        return None
+    if len(versions) > 1:
+        parser.error(f"Output already mixes index versions {sorted(map(str, versions))}; use a new output file")
+    version = versions.pop()
+    if version is None or not version_path(version).exists():
+        parser.error(f"Index version {version} used by the existing output is gone; "
+                     "use a new output file to answer against another index")
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions about a research paper")
+    parser.add_argument("--questions", required=True, type=Path, help="Input JSONL with one question per line")
+    parser.add_argument("--output", required=True, type=Path, help="Output JSONL; resumed if it already exists")
+    parser.add_argument("--pdf", type=Path, help="PDF to ingest first (default: reuse the published index)")
+    parser.add_argument("--parallel", type=int, default=1, help="Number of questions to run concurrently")
+    args = parser.parse_args()
+
+    ensure_directories()
+
+    questions = load_questions(args.questions)
+    completed, versions = load_completed(args.output)
+    index_version = resume_version(parser, versions)
+    if index_version is not None:
+        print(f"Resuming on index version {index_version}" + (f", not re-ingesting {args.pdf}" if args.pdf else ""))
+    elif args.pdf:
+        print(f"Processing PDF: {args.pdf}")
+        _, index_version = build_index(str(args.pdf))
+        publish_version(index_version)
+
+    pending = [item for item in questions if item["id"] not in completed]
+    print(f"{len(questions)} questions, {len(completed)} already answered, {len(pending)} to run")
+
+    with pinned_version(index_version) as index_version:
+        if index_version is None:
+            parser.error("No index has been published; pass --pdf to ingest a paper first")
+
+        graph = create_graph()
+        parallel = max(1, args.parallel)
+        failures = done = 0
+        with open(args.output, 'a', encoding='utf-8') as out, \
+                ThreadPoolExecutor(max_workers=parallel) as executor:
+
+            def write(future):
+                nonlocal failures, done
+                record = future.result()
+                done += 1
+                failures += bool(record.get("error"))
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                status = "failed" if record.get("error") else f"{record['seconds']}s"
+                print(f"[{done}/{len(pending)}] {record['id']}: {status}")
+
+            # Only `parallel` questions are in flight, so an interrupt waits for those alone
+            remaining = iter(pending)
+            running = set()
+            try:
+                while True:
+                    for item in remaining:
+                        running.add(executor.submit(answer_question, graph, item, index_version))
+                        if len(running) >= parallel:
+                            break
+                    if not running:
+                        break
+                    finished, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        write(future)
+            except KeyboardInterrupt:
+                print(f"Interrupted; finishing {len(running)} running question(s)")
+                for future in as_completed(running):
+                    write(future)
+                print("Run the same command again to resume")
+                sys.exit(130)
+
+    print(f"Finished with {failures} failure(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -68,3 +68,18 @@ Provide a clear, detailed answer based on the context. If the context doesn't co
     prompt = ChatPromptTemplate.from_template(template)
     llm = get_chat_model()
     return prompt | llm
+
+
+def summarize_chain():
+    """Chain to summarize a section of the paper, or a set of summaries"""
+    template = """Summarize the following text from a research paper in at most 5 sentences.
+Keep the key claims, methods, results and limitations it mentions.
+
+Text:
+{text}
+
+Provide ONLY the summary without any additional text."""
+    
+    prompt = ChatPromptTemplate.from_template(template)
+    llm = get_chat_model()
+    return prompt | llm
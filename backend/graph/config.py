@@ -2,18 +2,67 @@
 Configuration settings for the RAG application
 """
 
+import os
 from pathlib import Path
 
 # Directory paths
 UPLOAD_DIR = Path("uploads")
 EMBEDDINGS_DIR = Path("embeddings")
 CHECKPOINT_DB = "checkpoints.sqlite"
+# "exit" persists one checkpoint per turn instead of one per node transition
+CHECKPOINT_DURABILITY = "exit"
 MARKDOWN_OUTPUT = "marker_out.md"
 
+# Versioned index layout inside EMBEDDINGS_DIR
+INDEX_POINTER_FILE = "CURRENT"
+INDEX_VERSION_PREFIX = "v_"
+INDEX_BUILD_PREFIX = ".build_"
+INDEX_LEASE_DIR = "leases"
+INDEX_LEASE_STALE_SECONDS = 3600  # leases from other hosts, and unfinished builds, expire after this
+INDEX_LOCK_FILE = "index.lock"  # serializes pinning and collection across workers with shared state
+
+# Multi-worker deployment: with RAG_SHARED_STATE=1 every worker reads the
+# published index and conversation checkpoints from shared files in STATE_DIR
+# and SQLite instead of process memory. RAG_WORKERS > 1 implies shared state.
+WORKERS = int(os.getenv("RAG_WORKERS", "1"))
+SHARED_STATE = os.getenv("RAG_SHARED_STATE", "0") == "1" or WORKERS > 1
+STATE_DIR = Path("state")
+CHECKPOINT_POINTER_FILE = "checkpoint_db"
+CHECKPOINT_HOLD_DIR = "checkpoint_holds"  # which workers have each checkpoint database open
+INGEST_LOCK_FILE = "ingest.lock"
+
 # AWS Configuration
 AWS_REGION = "ap-south-1"
 BEDROCK_MODEL = "apac.anthropic.claude-sonnet-4-20250514-v1:0"
 
+# Startup mode: "background" serves immediately and imports heavy modules in a
+# warm-up thread, "lazy" imports them on first use, "eager" imports before serving
+STARTUP_MODE = os.getenv("RAG_STARTUP_MODE", "background")
+
+# Local model configuration
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+CHAT_MODEL = "llama3.2:1b"
+EMBEDDING_MODEL = "mxbai-embed-large"
+
+# Keep-alive: how long Ollama keeps the chat model loaded after its last call.
+# The embeddings client can't set one, so it gets the server's OLLAMA_KEEP_ALIVE.
+CHAT_MODEL_KEEP_ALIVE = 1800  # seconds
+# While there has been chat traffic within this window, models are pinged
+# before Ollama's reported expiry so they stay resident
+KEEP_ALIVE_TRAFFIC_WINDOW = 1800  # seconds
+KEEP_ALIVE_CHECK_INTERVAL = 30  # seconds
+OLLAMA_STATUS_TIMEOUT = 2  # seconds, for querying which models Ollama has loaded
+# A warm-up that fails (e.g. Ollama not up yet) is retried with exponential backoff
+WARMUP_RETRY_INITIAL = 5  # seconds
+WARMUP_RETRY_MAX = 300  # seconds
+
+# Model scheduling: concurrent calls allowed per model, and when to shed interactive load.
+# Limits apply per worker process.
+CHAT_MODEL_CONCURRENCY = 1
+EMBEDDING_MODEL_CONCURRENCY = 2
+SCHEDULER_MAX_QUEUE = 32
+SCHEDULER_QUEUE_DEADLINE = 30.0  # seconds
+
 # Text splitting configuration
 MARKDOWN_HEADERS = [
     ("#", "Header 1"),
@@ -23,11 +72,36 @@ MARKDOWN_HEADERS = [
 CHUNK_SIZE = 512
 CHUNK_OVERLAP = 80
 
+# Starter questions answered in the background after ingestion and served instantly by /chat
+PRECOMPUTE_STARTER_ANSWERS = True
+STARTER_QUESTIONS = [
+    "Summarize this paper",
+    "What methodology is used in this paper?",
+    "What are the main results of this paper?",
+    "What are the conclusions of this paper?",
+]
+STARTER_ANSWERS_FILE = "starter_answers.json"
+
 # Retrieval configuration
 RETRIEVAL_K = 4
 RETRIEVAL_TYPE = "mmr"
 
+# Hierarchical summaries: chunks are summarized per section, sections into the
+# whole document, and the summaries are embedded alongside the chunks
+HIERARCHICAL_SUMMARIES = True
+SUMMARY_SECTION_CHUNKS = 6      # max chunks (or child summaries) per summary
+SUMMARY_RETRIEVAL_K = 3
+SUMMARY_FETCH_K = 100           # candidates fetched before filtering to summary levels
+# Matched as whole words; kept to phrases that ask about the paper as a whole
+GLOBAL_QUESTION_KEYWORDS = [
+    "summarize", "summarise", "summary of", "overview", "main idea",
+    "main findings", "key findings", "main contributions", "key contributions",
+    "limitations", "conclusions", "this paper about", "the paper about",
+]
+
 def ensure_directories():
     """Create necessary directories if they don't exist"""
     UPLOAD_DIR.mkdir(exist_ok=True)
     EMBEDDINGS_DIR.mkdir(exist_ok=True)
+    if SHARED_STATE:
+        STATE_DIR.mkdir(exist_ok=True)
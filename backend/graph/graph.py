@@ -3,6 +3,9 @@ LangGraph workflow building and compilation
 """
 
 from langgraph.graph import StateGraph, START, END
+import sqlite3
+import weakref
+from typing import Optional
 from langgraph.checkpoint.memory import MemorySaver
 from models import AgentState
 from .nodes import (
@@ -10,14 +13,26 @@ from .nodes import (
     question_classifier,
     off_topic_response,
     retrieve,
-    generate_answer
+    generate_answer,
+    finalize_turn
 )
 from .edges import on_topic_router
 
-def create_graph():
-    """Create and compile the LangGraph workflow"""
-    # Use in-memory checkpointer
-    checkpointer = MemorySaver()
+def create_graph(checkpoint_db: Optional[str] = None):
+    """Create and compile the LangGraph workflow.
+
+    Conversation state is kept in memory unless ``checkpoint_db`` names a
+    SQLite database, which lets several worker processes share threads.
+    """
+    if checkpoint_db is None:
+        # Use in-memory checkpointer
+        checkpointer = MemorySaver()
+    else:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+        conn = sqlite3.connect(checkpoint_db, check_same_thread=False, timeout=30)
+        # WAL lets workers read checkpoints while another one writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        checkpointer = SqliteSaver(conn)
 
     # Build workflow
     workflow = StateGraph(AgentState)
@@ -28,6 +43,7 @@ def create_graph():
     workflow.add_node("off_topic_response", off_topic_response)
     workflow.add_node("retrieve", retrieve)
     workflow.add_node("generate_answer", generate_answer)
+    workflow.add_node("finalize_turn", finalize_turn)
 
     # Add edges
     workflow.add_edge(START, "question_rewriter")
@@ -41,10 +57,14 @@ def create_graph():
         }
     )
     workflow.add_edge("retrieve", "generate_answer")
-    workflow.add_edge("generate_answer", END)
-    workflow.add_edge("off_topic_response", END)
+    workflow.add_edge("generate_answer", "finalize_turn")
+    workflow.add_edge("off_topic_response", "finalize_turn")
+    workflow.add_edge("finalize_turn", END)
 
     # Compile
     graph = workflow.compile(checkpointer=checkpointer)
+    if checkpoint_db is not None:
+        # Close the connection once the graph is replaced and no in-flight request still holds it
+        weakref.finalize(graph, conn.close)
     return graph
     
\ No newline at end of file
@@ -2,34 +2,115 @@
 Helper utility functions for the RAG application
 """
 
+import re
 import shutil
+from functools import lru_cache
 from pathlib import Path
-from langchain_community.vectorstores import FAISS
-from .config import UPLOAD_DIR, EMBEDDINGS_DIR, MARKDOWN_OUTPUT, RETRIEVAL_TYPE, RETRIEVAL_K
-from .llm import get_embedding_function
+from typing import List, Optional, Tuple
+from langchain_core.documents import Document
+from .config import (
+    UPLOAD_DIR, MARKDOWN_OUTPUT, RETRIEVAL_TYPE, RETRIEVAL_K,
+    SUMMARY_RETRIEVAL_K, SUMMARY_FETCH_K, GLOBAL_QUESTION_KEYWORDS
+)
+
+# Whole words only, so e.g. "summary tokens" or "overall accuracy" stay on the chunk level
+_GLOBAL_QUESTION_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(keyword) for keyword in GLOBAL_QUESTION_KEYWORDS) + r")\b"
+)
+
+def is_global_question(question: str) -> bool:
+    """Whether a question is about the paper as a whole rather than a specific detail"""
+    return _GLOBAL_QUESTION_PATTERN.search(" ".join(question.lower().split())) is not None
+
+def _is_chunk(metadata: dict) -> bool:
+    # Indexes built before summaries existed have no "level" metadata
+    return metadata.get("level", "chunk") == "chunk"
+
+def _is_summary(metadata: dict) -> bool:
+    return not _is_chunk(metadata)
+
+@lru_cache(maxsize=4)
+def load_vectorstore(embeddings_path: str):
+    """Load a FAISS index version from local storage; versions are immutable, so recent ones are cached"""
+    # Imported here so the lightweight helpers below don't pull in FAISS and the model clients
+    from langchain_community.vectorstores import FAISS
+    from .llm import get_embedding_function
 
-def load_retriever(embeddings_path: str):
-    """Load FAISS retriever from local storage"""
     embedding_function = get_embedding_function()
-    db = FAISS.load_local(
+    return FAISS.load_local(
         folder_path=embeddings_path,
         embeddings=embedding_function,
         allow_dangerous_deserialization=True
     )
-    return db.as_retriever(search_type=RETRIEVAL_TYPE, search_kwargs={"k": RETRIEVAL_K})
+
+def search_vectorstore(db, question: str, summaries: bool = False,
+                       k: Optional[int] = None, search_type: str = RETRIEVAL_TYPE) -> List[Tuple[Document, float]]:
+    """Search only the section and document summaries, or only the leaf chunks, returning scores"""
+    if summaries:
+        k, fetch_k, filter_fn = k or SUMMARY_RETRIEVAL_K, SUMMARY_FETCH_K, _is_summary
+    else:
+        k = k or RETRIEVAL_K
+        fetch_k, filter_fn = max(20, 5 * k), _is_chunk
+    if search_type == "mmr":
+        embedding = db.embeddings.embed_query(question)
+        return db.max_marginal_relevance_search_with_score_by_vector(
+            embedding, k=k, fetch_k=fetch_k, filter=filter_fn
+        )
+    return db.similarity_search_with_score(question, k=k, fetch_k=fetch_k, filter=filter_fn)
+
+def retrieve_documents(embeddings_path: str, question: str) -> List[Tuple[Document, float]]:
+    """Retrieve from the summary level for whole-paper questions, from chunks otherwise"""
+    db = load_vectorstore(embeddings_path)
+    if is_global_question(question):
+        results = search_vectorstore(db, question, summaries=True)
+        if results:
+            print(f"Answering from {len(results)} summaries")
+            return results
+    return search_vectorstore(db, question)
+
+def document_refs(results: List[Tuple[Document, float]]) -> List[dict]:
+    """Compact references to retrieved documents, suitable for checkpointed state"""
+    return [{"id": doc.metadata["doc_id"], "score": float(score)} for doc, score in results]
+
+def load_documents(embeddings_path: str, refs: List[dict]) -> List[Document]:
+    """Rehydrate document references from the index version's docstore"""
+    db = load_vectorstore(embeddings_path)
+    documents = []
+    for ref in refs or []:
+        doc = db.docstore.search(ref["id"])
+        # The docstore returns an error string for unknown ids
+        if isinstance(doc, Document):
+            documents.append(doc)
+    return documents
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for matching identical requests"""
+    return " ".join(question.lower().split()).rstrip("?!. ")
+
+def format_source_documents(embeddings_path: str, refs: List[dict]) -> list:
+    """Format document references as source citations"""
+    scores = {ref["id"]: ref["score"] for ref in refs or []}
+    source_docs = []
+    for i, doc in enumerate(load_documents(embeddings_path, refs)):
+        source_docs.append({
+            "chunk_id": i + 1,
+            "content": doc.page_content,
+            "metadata": doc.metadata if hasattr(doc, 'metadata') else {},
+            "score": scores.get(doc.metadata.get("doc_id"))
+        })
+    return source_docs
 
 def cleanup_old_files():
-    """Delete previous PDFs and embeddings"""
+    """Delete previous PDFs and intermediate output.
+
+    Index versions are not touched here; they are retired by publishing a new
+    version (or None) through ``index_store`` once no request is using them.
+    """
     # Clear uploads
     if UPLOAD_DIR.exists():
         shutil.rmtree(UPLOAD_DIR)
         UPLOAD_DIR.mkdir()
     
-    # Clear embeddings
-    if EMBEDDINGS_DIR.exists():
-        shutil.rmtree(EMBEDDINGS_DIR)
-        EMBEDDINGS_DIR.mkdir()
-    
     # Remove markdown output
     if Path(MARKDOWN_OUTPUT).exists():
         Path(MARKDOWN_OUTPUT).unlink()
@@ -0,0 +1,219 @@
+"""
+Versioned FAISS index storage with atomic publish and garbage collection
+"""
+
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+import datetime
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+from .config import (
+    EMBEDDINGS_DIR, INDEX_POINTER_FILE, INDEX_VERSION_PREFIX, INDEX_BUILD_PREFIX,
+    INDEX_LEASE_DIR, INDEX_LEASE_STALE_SECONDS, INDEX_LOCK_FILE, SHARED_STATE
+)
+
+# Reference counts of versions pinned by in-flight requests in this process.
+# Each pinned version also has a lease file so other workers sharing
+# EMBEDDINGS_DIR don't collect it.
+_lock = threading.Lock()
+_pins = {}
+_building = set()
+_owner = f"{socket.gethostname()}.{os.getpid()}"
+
+
+@contextmanager
+def _index_lock():
+    """Make pinning and collection decisions atomic with each other, across workers with shared state"""
+    if not SHARED_STATE:
+        with _lock:
+            yield
+        return
+    from filelock import FileLock
+    with FileLock(str(EMBEDDINGS_DIR / INDEX_LOCK_FILE)), _lock:
+        yield
+
+
+def version_path(version: str) -> Path:
+    """Return the directory holding a published index version"""
+    return EMBEDDINGS_DIR / f"{INDEX_VERSION_PREFIX}{version}"
+
+
+def new_build_dir():
+    """Reserve a fresh version id and a private directory to build it in"""
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    version = f"{timestamp}_{uuid.uuid4().hex[:6]}"
+    build_dir = EMBEDDINGS_DIR / f"{INDEX_BUILD_PREFIX}{version}"
+    build_dir.mkdir(parents=True)
+    with _lock:
+        _building.add(version)
+    return version, build_dir
+
+
+def finish_build(version: str, build_dir: Path) -> Path:
+    """Move a completed build into place so it can be published.
+
+    The version stays protected from garbage collection, in this and other
+    workers, until it is published or dropped with ``discard_build``.
+    """
+    final_dir = version_path(version)
+    with _lock:
+        _lease_path(version).touch()
+    os.replace(build_dir, final_dir)
+    return final_dir
+
+
+def _release_build(version: str):
+    with _lock:
+        if version in _building:
+            _building.discard(version)
+            if version not in _pins:
+                _lease_path(version).unlink(missing_ok=True)
+
+
+def discard_build(version: str):
+    """Drop a finished build that won't be published"""
+    _release_build(version)
+    gc_versions()
+
+
+def abort_build(version: str, build_dir: Path):
+    """Discard a failed build"""
+    shutil.rmtree(build_dir, ignore_errors=True)
+    _release_build(version)
+
+
+def current_version() -> Optional[str]:
+    """Return the currently published version, or None if nothing is published"""
+    pointer = EMBEDDINGS_DIR / INDEX_POINTER_FILE
+    try:
+        version = pointer.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    if not version or not version_path(version).exists():
+        return None
+    return version
+
+
+def publish_version(version: Optional[str]):
+    """Atomically point readers at a new version (or at nothing when None)"""
+    pointer = EMBEDDINGS_DIR / INDEX_POINTER_FILE
+    if version is None:
+        pointer.unlink(missing_ok=True)
+    else:
+        tmp_pointer = EMBEDDINGS_DIR / f".{INDEX_POINTER_FILE}.{uuid.uuid4().hex[:6]}"
+        tmp_pointer.write_text(version, encoding="utf-8")
+        os.replace(tmp_pointer, pointer)
+        _release_build(version)
+    print(f"Published index version: {version}")
+    gc_versions()
+
+
+@contextmanager
+def pinned_version(version: Optional[str] = None):
+    """Pin a version (the current one by default) for the duration of a request so it is not collected"""
+    # Under the index lock, no worker can collect the version between reading it and writing the lease
+    with _index_lock():
+        if version is None:
+            version = current_version()
+        elif not version_path(version).exists():
+            version = None
+        if version is not None:
+            _pins[version] = _pins.get(version, 0) + 1
+            if _pins[version] == 1:
+                _lease_path(version).touch()
+    try:
+        yield version
+    finally:
+        if version is not None:
+            with _lock:
+                _unpin(version)
+            gc_versions()
+
+
+def _unpin(version: str):
+    """Drop one pin, removing the lease with the last one; call with _lock held"""
+    _pins[version] -= 1
+    if _pins[version] == 0:
+        del _pins[version]
+        if version not in _building:
+            _lease_path(version).unlink(missing_ok=True)
+
+
+def _lease_path(version: str) -> Path:
+    leases_dir = EMBEDDINGS_DIR / INDEX_LEASE_DIR
+    leases_dir.mkdir(exist_ok=True)
+    return leases_dir / f"{version}@{_owner}"
+
+
+def lease_alive(lease: Path) -> bool:
+    """Whether the process holding a lease may still be using it"""
+    host, _, pid = lease.name.rpartition("@")[2].rpartition(".")
+    if host == socket.gethostname():
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, ValueError):
+            pass
+        return True
+    # Leases from other hosts can't be checked directly; trust them until they go stale
+    try:
+        return time.time() - lease.stat().st_mtime < INDEX_LEASE_STALE_SECONDS
+    except FileNotFoundError:
+        return False
+
+
+def _leased_versions() -> set:
+    """Versions pinned by any live worker, removing leases left by dead ones"""
+    leases_dir = EMBEDDINGS_DIR / INDEX_LEASE_DIR
+    if not leases_dir.exists():
+        return set()
+    versions = set()
+    for lease in leases_dir.iterdir():
+        if lease_alive(lease):
+            versions.add(lease.name.rpartition("@")[0])
+        else:
+            lease.unlink(missing_ok=True)
+    return versions
+
+
+def _recent(path: Path) -> bool:
+    try:
+        return time.time() - path.stat().st_mtime < INDEX_LEASE_STALE_SECONDS
+    except FileNotFoundError:
+        return False
+
+
+def gc_versions():
+    """Delete versions that are neither published nor pinned by an in-flight request in any worker"""
+    if not EMBEDDINGS_DIR.exists():
+        return
+    doomed = []
+    with _index_lock():
+        keep = {current_version(), *_pins, *_building, *_leased_versions()}
+        for path in EMBEDDINGS_DIR.iterdir():
+            if not path.is_dir():
+                continue
+            if path.name.startswith(INDEX_VERSION_PREFIX):
+                if path.name[len(INDEX_VERSION_PREFIX):] in keep:
+                    continue
+                # Move the version aside while still holding the lock, so no worker can pin it once
+                # the lock is released; if removal is interrupted, the leftover is an abandoned build
+                aside = path.with_name(f"{INDEX_BUILD_PREFIX}{path.name}.gc")
+                try:
+                    os.replace(path, aside)
+                except OSError:
+                    continue
+                doomed.append((path.name, aside))
+            elif path.name.startswith(INDEX_BUILD_PREFIX):
+                # Another worker may still be building; only remove abandoned builds
+                if path.name[len(INDEX_BUILD_PREFIX):] not in keep and not _recent(path):
+                    doomed.append((path.name, path))
+    for name, path in doomed:
+        shutil.rmtree(path, ignore_errors=True)
+        print(f"Removed unused index version: {name}")
@@ -1,16 +1,67 @@
+from typing import Any, List, Optional
 from langchain_community.chat_models import ChatOllama
 from langchain_community.embeddings import OllamaEmbeddings
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable, RunnableConfig
+from .config import (
+    OLLAMA_BASE_URL, CHAT_MODEL, EMBEDDING_MODEL, CHAT_MODEL_CONCURRENCY, EMBEDDING_MODEL_CONCURRENCY,
+    CHAT_MODEL_KEEP_ALIVE
+)
+from .scheduler import ModelScheduler, get_scheduler
+from .singleflight import SingleFlight
 import os
 
+# Shared across embedding clients so identical concurrent inputs are embedded once
+_embedding_flight = SingleFlight()
+
+class ScheduledChatModel(Runnable):
+    """Chat model wrapper that waits for a scheduler slot before each call"""
+
+    def __init__(self, llm: Runnable, scheduler: ModelScheduler):
+        self.llm = llm
+        self.scheduler = scheduler
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        with self.scheduler.slot():
+            return self.llm.invoke(input, config, **kwargs)
+
+class CoalescingEmbeddings(Embeddings):
+    """Embeddings wrapper that coalesces identical in-flight requests and schedules the rest"""
+
+    def __init__(self, embeddings: Embeddings, model: str, scheduler: ModelScheduler):
+        self.embeddings = embeddings
+        self.model = model
+        self.scheduler = scheduler
+
+    def _scheduled(self, fn, *args):
+        with self.scheduler.slot():
+            return fn(*args)
+
+    def embed_query(self, text: str) -> List[float]:
+        result, _ = _embedding_flight.do(
+            (self.model, "query", text), self._scheduled, self.embeddings.embed_query, text
+        )
+        return result
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        result, _ = _embedding_flight.do(
+            (self.model, "documents", tuple(texts)), self._scheduled, self.embeddings.embed_documents, texts
+        )
+        return result
+
 def get_chat_model():
     os.environ["OLLAMA_USE_GPU"] = "0"   # CPU mode
     llm = ChatOllama(
-        model="llama3.2:1b",   # lightweight model
+        base_url=OLLAMA_BASE_URL,
+        model=CHAT_MODEL,   # lightweight model
         temperature=0.3,
-        num_ctx=4096
+        num_ctx=4096,
+        keep_alive=CHAT_MODEL_KEEP_ALIVE
     )
-    return llm
+    return ScheduledChatModel(llm, get_scheduler(CHAT_MODEL, CHAT_MODEL_CONCURRENCY))
 
 def get_embedding_function():
-    embeddings = OllamaEmbeddings(model="mxbai-embed-large")
-    return embeddings
+    embeddings = OllamaEmbeddings(base_url=OLLAMA_BASE_URL, model=EMBEDDING_MODEL)
+    return CoalescingEmbeddings(
+        embeddings, EMBEDDING_MODEL, get_scheduler(EMBEDDING_MODEL, EMBEDDING_MODEL_CONCURRENCY)
+    )
@@ -3,10 +3,11 @@ LangGraph workflow node functions
 """
 
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 from models import AgentState
 from .chains import rephrase_chain, classifier_chain, generate_answer_chain
-from .helpers import load_retriever
-from .config import EMBEDDINGS_DIR
+from .helpers import retrieve_documents, document_refs, load_documents
+from .index_store import version_path, current_version
 
 
 def question_rewriter(state: AgentState):
@@ -83,20 +84,20 @@ def off_topic_response(state: AgentState):
     return state
 
 
-def retrieve(state: AgentState):
-    """Retrieve relevant document chunks"""
+def retrieve(state: AgentState, config: RunnableConfig):
+    """Retrieve relevant document chunks from the index version pinned for this request"""
     print("Entering retrieve")
 
-    retriever = load_retriever(str(EMBEDDINGS_DIR))
-    documents = retriever.invoke(state["rephrased_question"])
-    print(documents)
-    state["documents"] = documents
+    results = retrieve_documents(_embeddings_path(config), state["rephrased_question"])
+    print(results)
+    # Only ids and scores go into the checkpointed state; text is rehydrated on demand
+    state["documents"] = document_refs(results)
 
-    print(f"Retrieved {len(documents)} documents")
+    print(f"Retrieved {len(results)} documents")
     return state
 
 
-def generate_answer(state: AgentState):
+def generate_answer(state: AgentState, config: RunnableConfig):
     """Generate final answer"""
     print("Entering generate_answer")
 
@@ -104,7 +105,7 @@ def generate_answer(state: AgentState):
         raise ValueError("State must include 'messages' before generating an answer.")
 
     history = state["messages"][:-1]  # Exclude current question
-    documents = state["documents"]
+    documents = load_documents(_embeddings_path(config), state["documents"])
     rephrased_question = state["rephrased_question"]
 
     chain = generate_answer_chain()
@@ -119,3 +120,24 @@ def generate_answer(state: AgentState):
 
     print(f"Generated answer: {generation[:100]}...")
     return state
+
+
+def finalize_turn(state: AgentState):
+    """Drop per-turn fields so they are not persisted in the thread's checkpoint"""
+    print("Entering finalize_turn")
+
+    return {
+        "question": None,
+        "on_topic": "",
+        "rephrased_question": "",
+        "proceed_to_generate": False,
+        "rephrase_count": 0
+    }
+
+
+def _embeddings_path(config: RunnableConfig) -> str:
+    """Directory of the index version pinned for this request"""
+    version = config.get("configurable", {}).get("index_version") or current_version()
+    if version is None:
+        raise ValueError("No index has been published. Please upload a PDF first.")
+    return str(version_path(version))
@@ -2,7 +2,7 @@
 PDF preprocessing and embedding creation functions
 """
 
-from typing import List
+from typing import List, Tuple
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.documents import Document
 from langchain_community.vectorstores import FAISS
@@ -10,11 +10,17 @@ from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharac
 # from marker.converters.pdf import PdfConverter
 # from marker.models import create_model_dict
 # from marker.output import text_from_rendered
-from .config import MARKDOWN_OUTPUT, MARKDOWN_HEADERS, CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDINGS_DIR
+from .config import (
+    MARKDOWN_OUTPUT, MARKDOWN_HEADERS, CHUNK_SIZE, CHUNK_OVERLAP,
+    HIERARCHICAL_SUMMARIES, SUMMARY_SECTION_CHUNKS
+)
+from .chains import summarize_chain
 from .llm import get_embedding_function
+from .index_store import new_build_dir, finish_build, abort_build, version_path
+from .scheduler import Priority, priority_scope
 
-def preprocess_pdf(pdf_path: str) -> List[Document]:
-    """Extract text from PDF and create document chunks"""
+def load_pdf_text(pdf_path: str) -> str:
+    """Extract the text of every page of a PDF"""
     # Extract text using Marker
     # converter = PdfConverter(artifact_dict=create_model_dict())
     # rendered = converter(pdf_path)
@@ -23,14 +29,11 @@ def preprocess_pdf(pdf_path: str) -> List[Document]:
 
     #Extract text using pypdfloader
     loader = PyPDFLoader(pdf_path)
-    text = loader.load()
-    text = text[0].page_content
-    print(text)
-    print(type(text))
-    # Save markdown
-    with open(MARKDOWN_OUTPUT, 'w', encoding='utf-8') as f:
-        f.write(text)
-    
+    pages = loader.load()
+    return "\n\n".join(page.page_content for page in pages)
+
+def split_text(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> List[Document]:
+    """Split text into chunks by Markdown header, then by size"""
     # Split by headers
     markdown_splitter = MarkdownHeaderTextSplitter(
         headers_to_split_on=MARKDOWN_HEADERS,
@@ -40,16 +43,167 @@ def preprocess_pdf(pdf_path: str) -> List[Document]:
     
     # Further chunk splitting
     text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
     )
     splits = text_splitter.split_documents(md_header_splits)
+    for i, split in enumerate(splits):
+        split.metadata["level"] = "chunk"
+        split.metadata["chunk_index"] = i
     
     return splits
 
-def create_embeddings(documents: List[Document]):
-    """Create and save FAISS embeddings"""
-    embedding_function = get_embedding_function()
-    db = FAISS.from_documents(documents, embedding_function)
-    db.save_local(folder_path=str(EMBEDDINGS_DIR))
-    print(f"Saved {len(documents)} document chunks to embeddings")
+def preprocess_pdf(pdf_path: str) -> List[Document]:
+    """Extract text from PDF and create document chunks"""
+    text = load_pdf_text(pdf_path)
+    print(text)
+    print(type(text))
+    # Save markdown
+    with open(MARKDOWN_OUTPUT, 'w', encoding='utf-8') as f:
+        f.write(text)
+    
+    return split_text(text)
+
+def _sections(chunks: List[Document]) -> List[List[Document]]:
+    """Split chunks into runs of consecutive chunks under the same headers"""
+    sections = []
+    for chunk in chunks:
+        if sections and all(
+            sections[-1][0].metadata.get(name) == chunk.metadata.get(name) for _, name in MARKDOWN_HEADERS
+        ):
+            sections[-1].append(chunk)
+        else:
+            sections.append([chunk])
+    return sections
+
+def _section_groups(chunks: List[Document]) -> List[List[Document]]:
+    """Group chunks for section summaries, at most SUMMARY_SECTION_CHUNKS per group.
+
+    Long sections are split into evenly sized groups so no group is a short
+    remainder. Short sections are merged whole into the previous group while
+    it has room, instead of getting a near-copy summary of one chunk each.
+    """
+    groups = []
+    for section in _sections(chunks):
+        short = len(section) < SUMMARY_SECTION_CHUNKS // 2
+        if short and groups and len(groups[-1]) + len(section) <= SUMMARY_SECTION_CHUNKS:
+            groups[-1].extend(section)
+            continue
+        parts = -(-len(section) // SUMMARY_SECTION_CHUNKS)
+        for i in range(parts):
+            groups.append(section[i * len(section) // parts:(i + 1) * len(section) // parts])
+    return groups
+
+def _section_metadata(group: List[Document]) -> dict:
+    """Headers shared by every chunk in a group, plus every section a merged group covers"""
+    metadata = {}
+    for _, name in MARKDOWN_HEADERS:
+        values = {chunk.metadata.get(name) for chunk in group}
+        if len(values) > 1:
+            break
+        if None not in values:
+            metadata[name] = values.pop()
+    sections = []
+    for chunk in group:
+        section = " > ".join(chunk.metadata[name] for _, name in MARKDOWN_HEADERS if name in chunk.metadata)
+        if section and section not in sections:
+            sections.append(section)
+    if len(sections) > 1:
+        metadata["sections"] = sections
+    return metadata
+
+def build_summary_tree(chunks: List[Document]) -> List[Document]:
+    """Summarize chunks into sections and sections into the whole document"""
+    chain = summarize_chain()
+
+    def summarize(documents: List[Document], metadata: dict) -> Document:
+        response = chain.invoke({"text": "\n\n".join(doc.page_content for doc in documents)})
+        return Document(page_content=response.content.strip(), metadata=metadata)
+
+    sections = []
+    for group in _section_groups(chunks):
+        metadata = _section_metadata(group)
+        metadata.update(level="section", chunk_indexes=[chunk.metadata["chunk_index"] for chunk in group])
+        sections.append(summarize(group, metadata))
+    summaries = list(sections)
+
+    # Fold summaries until they fit in a single document-level summary
+    layer = sections
+    while len(layer) > SUMMARY_SECTION_CHUNKS:
+        layer = [
+            summarize(layer[i:i + SUMMARY_SECTION_CHUNKS], {"level": "section"})
+            for i in range(0, len(layer), SUMMARY_SECTION_CHUNKS)
+        ]
+        summaries.extend(layer)
+    summaries.append(summarize(layer, {"level": "document"}))
+
+    print(f"Built {len(summaries)} summaries from {len(chunks)} chunks")
+    return summaries
+
+def build_index(pdf_path: str, summaries: bool = HIERARCHICAL_SUMMARIES) -> Tuple[List[Document], str]:
+    """Chunk a PDF, optionally build its summary tree, and embed everything into a new index version.
+
+    Returns the leaf chunks and the unpublished version id. Model calls run in
+    the batch lane so they yield to interactive chat.
+    """
+    documents = preprocess_pdf(pdf_path)
+    with priority_scope(Priority.BATCH):
+        indexed = list(documents)
+        if summaries:
+            print("Building summary tree...")
+            indexed.extend(build_summary_tree(documents))
+        print("Creating embeddings...")
+        version = create_embeddings(indexed)
+    return documents, version
+
+def add_summaries(version: str, chunks: List[Document]) -> str:
+    """Build the summary tree for an index version's chunks and return a new version holding both.
+
+    The chunks are copied from the existing version rather than re-embedded.
+    Runs in the batch lane; the returned version is unpublished.
+    """
+    with priority_scope(Priority.BATCH):
+        print("Building summary tree...")
+        summaries = build_summary_tree(chunks)
+        new_version, build_dir = new_build_dir()
+        try:
+            # A private copy: the cached store of the live version must not change
+            db = FAISS.load_local(
+                folder_path=str(version_path(version)),
+                embeddings=get_embedding_function(),
+                allow_dangerous_deserialization=True
+            )
+            db.add_documents(summaries, ids=_assign_ids(summaries, start=db.index.ntotal))
+            db.save_local(folder_path=str(build_dir))
+            finish_build(new_version, build_dir)
+        except Exception:
+            abort_build(new_version, build_dir)
+            raise
+    print(f"Saved {len(summaries)} summaries on top of version {version} as version {new_version}")
+    return new_version
+
+def _assign_ids(documents: List[Document], start: int = 0) -> List[str]:
+    """Give documents stable ids so checkpointed state can reference them instead of copying them"""
+    ids = [str(i) for i in range(start, start + len(documents))]
+    for doc_id, document in zip(ids, documents):
+        document.metadata["doc_id"] = doc_id
+    return ids
+
+def create_embeddings(documents: List[Document]) -> str:
+    """Create FAISS embeddings in a new index version and return its id.
+
+    The version is built in a private directory and only moved into place once
+    complete; call ``index_store.publish_version`` to make it live.
+    """
+    version, build_dir = new_build_dir()
+    ids = _assign_ids(documents)
+    try:
+        embedding_function = get_embedding_function()
+        db = FAISS.from_documents(documents, embedding_function, ids=ids)
+        db.save_local(folder_path=str(build_dir))
+        finish_build(version, build_dir)
+    except Exception:
+        abort_build(version, build_dir)
+        raise
+    print(f"Saved {len(documents)} document chunks to embeddings version {version}")
+    return version
@@ -0,0 +1,209 @@
+"""
+Admission control and priority scheduling for model calls
+"""
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Dict, Optional
+from .config import SCHEDULER_MAX_QUEUE, SCHEDULER_QUEUE_DEADLINE
+
+
+class Priority(IntEnum):
+    """Scheduling lanes; lower values are served first"""
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+# Lane used by model calls made from the current context (thread or task)
+_current_priority = ContextVar("model_priority", default=Priority.INTERACTIVE)
+# Whether model calls from the current context count towards service-time estimates
+_measured = ContextVar("model_measured", default=True)
+
+
+@contextmanager
+def priority_scope(priority: Priority):
+    """Run model calls made inside the block in the given lane"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+@contextmanager
+def unmeasured():
+    """Leave model calls made inside the block (e.g. warm-up pings) out of service-time estimates"""
+    token = _measured.set(False)
+    try:
+        yield
+    finally:
+        _measured.reset(token)
+
+
+class SchedulerOverloaded(Exception):
+    """Raised when an interactive call is shed instead of queued"""
+
+    def __init__(self, model: str, retry_after: float):
+        self.model = model
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"Model '{model}' is overloaded, retry after {self.retry_after}s")
+
+
+class ModelScheduler:
+    """Bounded-concurrency priority queue in front of one model.
+
+    Interactive calls are shed once the queue is full or their expected wait
+    exceeds the deadline; batch calls always queue behind interactive ones.
+    """
+
+    def __init__(self, model: str, max_concurrency: int,
+                 max_queue: int = SCHEDULER_MAX_QUEUE,
+                 queue_deadline: float = SCHEDULER_QUEUE_DEADLINE):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_deadline = queue_deadline
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._active_lanes = {lane: 0 for lane in Priority}
+        # Metrics
+        self._served = 0
+        self._shed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        # Per lane, so short pings and long batch calls don't skew interactive estimates
+        self._service_avg = {lane: 0.0 for lane in Priority}
+        self._service_samples = {lane: 0 for lane in Priority}
+        # Wall-clock time of the last successful call
+        self.last_used: Optional[float] = None
+
+    def _estimated_wait(self) -> float:
+        """Expected queueing time for a new interactive call, based on average service times"""
+        ahead = sum(1 for priority, _ in self._queue if priority == Priority.INTERACTIVE)
+        wait = ahead * self._service_avg[Priority.INTERACTIVE]
+        if self._active >= self.max_concurrency:
+            # The next slot frees up when the quickest kind of running call finishes
+            wait += min(self._service_avg[lane] for lane, active in self._active_lanes.items() if active)
+        return wait / self.max_concurrency
+
+    def _shed_call(self, retry_after: float):
+        self._shed += 1
+        raise SchedulerOverloaded(self.model, retry_after)
+
+    def admit(self, priority: Priority = Priority.INTERACTIVE):
+        """Raise SchedulerOverloaded if a call in this lane would be shed right now"""
+        with self._cond:
+            self._check_admission(priority)
+
+    def _check_admission(self, priority: Priority):
+        if priority != Priority.INTERACTIVE:
+            return
+        estimated_wait = self._estimated_wait()
+        if len(self._queue) >= self.max_queue or estimated_wait > self.queue_deadline:
+            self._shed_call(estimated_wait or self.queue_deadline)
+
+    @contextmanager
+    def slot(self, priority: Optional[Priority] = None):
+        """Wait for a concurrency slot in the given (or current) lane"""
+        if priority is None:
+            priority = _current_priority.get()
+
+        enqueued = time.monotonic()
+        with self._cond:
+            self._check_admission(priority)
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._queue, entry)
+            while self._active >= self.max_concurrency or self._queue[0] != entry:
+                remaining = enqueued + self.queue_deadline - time.monotonic()
+                if priority == Priority.INTERACTIVE and remaining <= 0:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                    self._shed_call(self._estimated_wait() or self.queue_deadline)
+                self._cond.wait(remaining if priority == Priority.INTERACTIVE else None)
+            heapq.heappop(self._queue)
+            self._active += 1
+            self._active_lanes[priority] += 1
+            waited = time.monotonic() - enqueued
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            # Another slot may be free for the next entry in line
+            self._cond.notify_all()
+
+        measured = _measured.get()
+        started = time.monotonic()
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        finally:
+            finished = time.monotonic()
+            with self._cond:
+                self._active -= 1
+                self._active_lanes[priority] -= 1
+                self._served += 1
+                if measured:
+                    service = finished - started
+                    self._service_samples[priority] += 1
+                    # Exponential moving average keeps the estimate responsive to load
+                    if self._service_samples[priority] == 1:
+                        self._service_avg[priority] = service
+                    else:
+                        self._service_avg[priority] = 0.8 * self._service_avg[priority] + 0.2 * service
+                if succeeded:
+                    self.last_used = time.time()
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Snapshot of queue depth and wait-time metrics"""
+        with self._cond:
+            queued = {lane.name.lower(): 0 for lane in Priority}
+            for priority, _ in self._queue:
+                queued[Priority(priority).name.lower()] += 1
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                "queued": queued,
+                "served": self._served,
+                "shed": self._shed,
+                "avg_wait_seconds": self._wait_total / self._served if self._served else 0.0,
+                "max_wait_seconds": self._wait_max,
+                "avg_service_seconds": {lane.name.lower(): avg for lane, avg in self._service_avg.items()},
+                "estimated_wait_seconds": self._estimated_wait(),
+                "last_used": self.last_used,
+            }
+
+
+_schedulers: Dict[str, ModelScheduler] = {}
+_registry_lock = threading.Lock()
+
+
+def get_scheduler(model: str, max_concurrency: int = 1) -> ModelScheduler:
+    """Return the process-wide scheduler for a model, creating it on first use"""
+    with _registry_lock:
+        if model not in _schedulers:
+            _schedulers[model] = ModelScheduler(model, max_concurrency)
+        return _schedulers[model]
+
+
+def check_admission(priority: Priority = Priority.INTERACTIVE):
+    """Shed early if any model scheduler would reject a call in this lane"""
+    with _registry_lock:
+        schedulers = list(_schedulers.values())
+    for scheduler in schedulers:
+        scheduler.admit(priority)
+
+
+def scheduler_stats() -> Dict[str, dict]:
+    """Metrics for every model scheduler"""
+    with _registry_lock:
+        schedulers = dict(_schedulers)
+    return {model: scheduler.stats() for model, scheduler in schedulers.items()}
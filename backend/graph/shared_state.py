@@ -0,0 +1,116 @@
+"""
+State shared between worker processes in multi-worker deployments
+"""
+
+import os
+import socket
+import threading
+import uuid
+import datetime
+from contextlib import contextmanager
+from pathlib import Path
+from .config import (
+    SHARED_STATE, STATE_DIR, CHECKPOINT_DB, CHECKPOINT_POINTER_FILE, CHECKPOINT_HOLD_DIR, INGEST_LOCK_FILE
+)
+from .index_store import lease_alive
+
+# Graphs in this process using each checkpoint database. Each database in use
+# also has a hold file, so other workers don't delete it.
+_holds_lock = threading.Lock()
+_holds = {}
+_owner = f"{socket.gethostname()}.{os.getpid()}"
+# Uploads and background summary builds publish under this lock
+_ingest_lock = threading.Lock()
+
+
+def active_checkpoint_db() -> str:
+    """Return the checkpoint database every worker should currently use"""
+    try:
+        db = (STATE_DIR / CHECKPOINT_POINTER_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return CHECKPOINT_DB
+    return db or CHECKPOINT_DB
+
+
+def rotate_checkpoint_db():
+    """Point all workers at a fresh checkpoint database, clearing conversation history.
+
+    Returns the old and new database filenames. The old database is deleted
+    once no worker has it open any more.
+    """
+    old_db = active_checkpoint_db()
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    new_db = f"checkpoints_{timestamp}_{uuid.uuid4().hex[:6]}.sqlite"
+    pointer = STATE_DIR / CHECKPOINT_POINTER_FILE
+    tmp_pointer = STATE_DIR / f".{CHECKPOINT_POINTER_FILE}.{uuid.uuid4().hex[:6]}"
+    tmp_pointer.write_text(new_db, encoding="utf-8")
+    os.replace(tmp_pointer, pointer)
+    print(f"Switched checkpoint database: {old_db} -> {new_db}")
+    gc_checkpoint_dbs()
+    return old_db, new_db
+
+
+def _hold_path(db: str) -> Path:
+    holds_dir = STATE_DIR / CHECKPOINT_HOLD_DIR
+    holds_dir.mkdir(exist_ok=True)
+    return holds_dir / f"{db}@{_owner}"
+
+
+def hold_checkpoint_db(db: str):
+    """Record that a graph in this process uses a checkpoint database"""
+    with _holds_lock:
+        _holds[db] = _holds.get(db, 0) + 1
+        _hold_path(db).touch()
+
+
+def refresh_checkpoint_hold(db: str):
+    """Keep this worker's hold fresh; holds from other hosts expire when not refreshed"""
+    with _holds_lock:
+        if db in _holds:
+            _hold_path(db).touch()
+
+
+def release_checkpoint_db(db: str):
+    """Drop a graph's use of a checkpoint database, deleting databases no worker uses"""
+    with _holds_lock:
+        _holds[db] -= 1
+        if _holds[db] == 0:
+            del _holds[db]
+            _hold_path(db).unlink(missing_ok=True)
+    gc_checkpoint_dbs()
+
+
+def gc_checkpoint_dbs():
+    """Delete checkpoint databases that are neither active nor open in any live worker"""
+    keep = {active_checkpoint_db()}
+    holds_dir = STATE_DIR / CHECKPOINT_HOLD_DIR
+    if holds_dir.exists():
+        for hold in holds_dir.iterdir():
+            if lease_alive(hold):
+                keep.add(hold.name.rpartition("@")[0])
+            else:
+                hold.unlink(missing_ok=True)
+    base = Path(CHECKPOINT_DB)
+    for db in base.parent.glob(f"{base.stem}*{base.suffix}"):
+        if str(db) in keep or db.name in keep:
+            continue
+        try:
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{db}{suffix}").unlink(missing_ok=True)
+        except OSError as e:
+            # e.g. still open on a platform that can't delete open files; retried on the next rotation
+            print(f"Could not remove checkpoint database {db.name}: {e}")
+            continue
+        print(f"Removed unused checkpoint database: {db.name}")
+
+
+@contextmanager
+def ingest_lock():
+    """Serialize ingestion across threads and, with shared state, across worker processes"""
+    if not SHARED_STATE:
+        with _ingest_lock:
+            yield
+        return
+    from filelock import FileLock
+    with FileLock(str(STATE_DIR / INGEST_LOCK_FILE)):
+        yield
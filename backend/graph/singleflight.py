@@ -0,0 +1,64 @@
+"""
+Single-flight coalescing of identical in-flight calls
+"""
+
+import threading
+from typing import Any, Callable, Hashable, Tuple
+
+
+class _Call:
+    """An in-flight call whose result is shared with every waiter"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run a function once per key while a call for that key is in flight.
+
+    Callers arriving with a key that is already running block until the first
+    call finishes and receive its result (or its exception) instead of running
+    the work again. Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Tuple[Any, bool]:
+        """Return ``(result, shared)``; ``shared`` is True for callers that reused another call's result"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.waiters:
+                print(f"Coalesced {call.waiters} identical request(s)")
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently running"""
+        with self._lock:
+            return len(self._calls)
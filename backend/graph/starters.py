@@ -0,0 +1,84 @@
+"""
+Precomputed answers for the suggested starter questions
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Optional
+from .config import STARTER_QUESTIONS, STARTER_ANSWERS_FILE
+from .helpers import retrieve_documents, document_refs, normalize_question
+from .index_store import version_path, pinned_version
+from .scheduler import Priority, priority_scope
+
+# Loaded answers per index version
+_answers_cache = {}
+_cache_lock = threading.Lock()
+
+
+def precompute_starter_answers(version: str):
+    """Answer STARTER_QUESTIONS against an index version and store them alongside it"""
+    from .chains import generate_answer_chain
+
+    started = time.perf_counter()
+    with pinned_version(version) as pinned, priority_scope(Priority.BATCH):
+        if pinned is None:
+            print(f"Index version {version} is gone, skipping starter answers")
+            return
+        chain = generate_answer_chain()
+        answers = {}
+        for question in STARTER_QUESTIONS:
+            results = retrieve_documents(str(version_path(version)), question)
+            response = chain.invoke({
+                "history": [],
+                "context": [doc for doc, _ in results],
+                "question": question
+            })
+            answers[normalize_question(question)] = {
+                "question": question,
+                "answer": response.content.strip(),
+                "documents": document_refs(results)
+            }
+
+        # Write atomically so readers never see a partial file
+        path = version_path(version) / STARTER_ANSWERS_FILE
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(answers), encoding="utf-8")
+        os.replace(tmp_path, path)
+    print(f"Precomputed {len(answers)} starter answers for version {version} in {time.perf_counter() - started:.1f}s")
+
+
+def start_precompute(version: str) -> threading.Thread:
+    """Precompute starter answers in a background thread"""
+    def run():
+        try:
+            precompute_starter_answers(version)
+        except Exception as e:
+            print(f"Starter answer precomputation failed: {e}")
+
+    thread = threading.Thread(target=run, name=f"starters-{version}", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_starter_answer(version: str, question: str) -> Optional[dict]:
+    """Return the precomputed answer for a question on an index version, if there is one"""
+    with _cache_lock:
+        answers = _answers_cache.get(version)
+    if answers is None:
+        try:
+            answers = json.loads((version_path(version) / STARTER_ANSWERS_FILE).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            # Not computed (yet); check again on the next request
+            return None
+        with _cache_lock:
+            # Versions are immutable, so only the live ones need to stay cached
+            for cached in [v for v in _answers_cache if not version_path(v).exists()]:
+                del _answers_cache[cached]
+            _answers_cache[version] = answers
+
+    starter = answers.get(normalize_question(question))
+    if starter is None:
+        return None
+    return {"answer": starter["answer"], "documents": starter["documents"]}
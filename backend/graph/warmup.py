@@ -0,0 +1,193 @@
+"""
+Deferred initialization, model warm-up and keep-alive management
+"""
+
+import datetime
+import importlib
+import json
+import threading
+import time
+import urllib.request
+from typing import Optional
+from .config import (
+    OLLAMA_BASE_URL, CHAT_MODEL, EMBEDDING_MODEL, KEEP_ALIVE_TRAFFIC_WINDOW, KEEP_ALIVE_CHECK_INTERVAL,
+    OLLAMA_STATUS_TIMEOUT, WARMUP_RETRY_INITIAL, WARMUP_RETRY_MAX
+)
+from .scheduler import Priority, priority_scope, unmeasured
+
+# Modules that pull in LangChain, LangGraph, FAISS and the PDF tooling
+HEAVY_MODULES = (
+    "graph.graph",
+    "graph.preprocess",
+    "langchain_community.vectorstores",
+)
+
+MODELS = (CHAT_MODEL, EMBEDDING_MODEL)
+
+_imports_done = threading.Event()
+# Models this process has loaded at least once
+_loaded_models = set()
+_loaded_lock = threading.Lock()
+# Held while a re-warm of evicted models runs
+_rewarm_lock = threading.Lock()
+_last_traffic = 0.0
+
+
+def warm_imports():
+    """Import the heavy modules so the first request doesn't pay for them"""
+    started = time.perf_counter()
+    for module in HEAVY_MODULES:
+        importlib.import_module(module)
+    _imports_done.set()
+    print(f"Warmed up imports in {time.perf_counter() - started:.2f}s")
+
+
+def _ping_model(model: str):
+    """Make a minimal call that loads the model (or keeps it loaded)"""
+    from .llm import get_chat_model, get_embedding_function
+
+    if model == CHAT_MODEL:
+        get_chat_model().invoke("Reply with OK", num_predict=1)
+    else:
+        get_embedding_function().embed_query(f"warm-up {time.time()}")
+
+
+def warm_models(models=MODELS) -> bool:
+    """Load models into memory in the batch lane, so real traffic goes first; return whether all loaded"""
+    all_loaded = True
+    # Pings are far shorter than real calls, so they would skew the wait estimates
+    with priority_scope(Priority.BATCH), unmeasured():
+        for model in models:
+            started = time.perf_counter()
+            try:
+                _ping_model(model)
+            except Exception as e:
+                all_loaded = False
+                print(f"Warm-up of {model} failed: {e}")
+                continue
+            with _loaded_lock:
+                _loaded_models.add(model)
+            print(f"Warmed up {model} in {time.perf_counter() - started:.2f}s")
+    return all_loaded
+
+
+def warm_models_until_loaded():
+    """Retry warm-up with exponential backoff until every model has loaded once, with or without traffic"""
+    delay = WARMUP_RETRY_INITIAL
+    while True:
+        with _loaded_lock:
+            pending = [model for model in MODELS if model not in _loaded_models]
+        if not pending or warm_models(pending):
+            return
+        print(f"Retrying model warm-up in {delay}s")
+        time.sleep(delay)
+        delay = min(delay * 2, WARMUP_RETRY_MAX)
+
+
+def start_rewarm(models) -> bool:
+    """Reload models Ollama has evicted in a background thread; return whether one was started.
+
+    Skipped until the startup warm-up has loaded every model once (it retries
+    on its own) and while a previous re-warm is still running.
+    """
+    if not models_loaded() or not _rewarm_lock.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            warm_models(models)
+        finally:
+            _rewarm_lock.release()
+
+    start_background_warmup(run)
+    return True
+
+
+def warm_all():
+    """Import heavy modules, then load the models"""
+    warm_imports()
+    warm_models_until_loaded()
+
+
+def start_background_warmup(target=warm_all) -> threading.Thread:
+    """Run warm-up in a daemon thread and return it"""
+    thread = threading.Thread(target=target, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def record_traffic():
+    """Note user traffic; models are kept resident while traffic is recent"""
+    global _last_traffic
+    _last_traffic = time.time()
+
+
+def _model_key(name: str) -> str:
+    # Ollama reports untagged models with an explicit ":latest"
+    return name if ":" in name else f"{name}:latest"
+
+
+def ollama_loaded_models() -> Optional[dict]:
+    """Models the Ollama server holds in memory, mapped to when they expire (None if unknown).
+
+    Returns None when Ollama can't be reached. Asking the server rather than
+    tracking calls locally accounts for other workers and Ollama restarts.
+    """
+    try:
+        with urllib.request.urlopen(f"{OLLAMA_BASE_URL}/api/ps", timeout=OLLAMA_STATUS_TIMEOUT) as response:
+            running = json.load(response).get("models") or []
+    except (OSError, ValueError):
+        return None
+    loaded = {}
+    for entry in running:
+        try:
+            expires_at = datetime.datetime.fromisoformat(entry["expires_at"]).timestamp()
+        except (KeyError, TypeError, ValueError):
+            expires_at = None
+        loaded[_model_key(entry.get("name") or entry.get("model", ""))] = expires_at
+    return loaded
+
+
+def models_warm() -> dict:
+    """Whether each model is currently loaded in Ollama"""
+    loaded = ollama_loaded_models() or {}
+    return {model: _model_key(model) in loaded for model in MODELS}
+
+
+def keep_alive_loop():
+    """Reload or ping models before Ollama unloads them while there is recent traffic"""
+    while True:
+        time.sleep(KEEP_ALIVE_CHECK_INTERVAL)
+        if time.time() - _last_traffic > KEEP_ALIVE_TRAFFIC_WINDOW:
+            # No recent traffic: let Ollama unload the models
+            continue
+        loaded = ollama_loaded_models()
+        if loaded is None:
+            continue
+        # Leave a margin of two checks so the ping lands before eviction
+        deadline = time.time() + 2 * KEEP_ALIVE_CHECK_INTERVAL
+        expiring = [
+            model for model in MODELS
+            if _model_key(model) not in loaded
+            or (loaded[_model_key(model)] is not None and loaded[_model_key(model)] < deadline)
+        ]
+        if expiring:
+            warm_models(expiring)
+
+
+def start_keep_alive() -> threading.Thread:
+    """Run the keep-alive loop in a daemon thread and return it"""
+    thread = threading.Thread(target=keep_alive_loop, name="keep-alive", daemon=True)
+    thread.start()
+    return thread
+
+
+def imports_ready() -> bool:
+    """Whether the heavy modules have been imported"""
+    return _imports_done.is_set()
+
+
+def models_loaded() -> bool:
+    """Whether every model has been loaded at least once by this process"""
+    with _loaded_lock:
+        return _loaded_models.issuperset(MODELS)
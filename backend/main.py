@@ -3,25 +3,65 @@ FastAPI application for Research Paper RAG
 """
 
 import uuid
+import asyncio
 import datetime
+import threading
+import weakref
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from langchain_core.messages import HumanMessage
-from graph.config import ensure_directories, UPLOAD_DIR, EMBEDDINGS_DIR, CHECKPOINT_DB
+from langchain_core.messages import HumanMessage, AIMessage
+from graph.config import (
+    ensure_directories, UPLOAD_DIR, CHECKPOINT_DB, CHECKPOINT_DURABILITY,
+    STARTUP_MODE, PRECOMPUTE_STARTER_ANSWERS, STARTER_QUESTIONS, SHARED_STATE, WORKERS,
+    HIERARCHICAL_SUMMARIES
+)
 from models import (
     ChatRequest, ChatResponse, UploadResponse, 
-    HealthResponse, NewSessionResponse, ClearAllResponse
+    HealthResponse, NewSessionResponse, ClearAllResponse, MetricsResponse,
+    StarterQuestionsResponse
+)
+from graph.helpers import cleanup_old_files, normalize_question, format_source_documents
+from graph.index_store import current_version, publish_version, pinned_version, version_path, discard_build
+from graph.singleflight import SingleFlight
+from graph.scheduler import (
+    Priority, SchedulerOverloaded, check_admission, scheduler_stats
+)
+from graph.shared_state import (
+    active_checkpoint_db, rotate_checkpoint_db, hold_checkpoint_db, refresh_checkpoint_hold,
+    release_checkpoint_db, ingest_lock as shared_ingest_lock
+)
+from graph.starters import get_starter_answer, start_precompute
+from graph.warmup import (
+    warm_imports, warm_models, warm_models_until_loaded, start_background_warmup, start_keep_alive,
+    record_traffic, imports_ready, models_warm, start_rewarm
 )
-from graph.helpers import cleanup_old_files
-from graph.preprocess import preprocess_pdf, create_embeddings
-from graph.graph import create_graph
 
 # Initialize directories
 ensure_directories()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Defer heavy initialization according to STARTUP_MODE.
+    graph.graph and graph.preprocess are imported inside the handlers that use
+    them, so /health can be served before LangChain, FAISS and the PDF tooling load.
+    Models are loaded into Ollama after the imports (retrying until Ollama is
+    reachable), and kept resident while there is chat traffic.
+    """
+    if STARTUP_MODE == "eager":
+        warm_imports()
+        if not warm_models():
+            start_background_warmup(warm_models_until_loaded)
+    elif STARTUP_MODE == "background":
+        start_background_warmup()
+    start_keep_alive()
+    yield
+
 # FastAPI app
-app = FastAPI(title="Research Paper RAG API")
+app = FastAPI(title="Research Paper RAG API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -34,15 +74,130 @@ app.add_middleware(
 
 # Global graph instance
 graph = None
+# Checkpoint database the global graph uses in shared-state mode
+graph_checkpoint_db = None
+
+# Coalesces identical first-turn questions against the same index version
+chat_flight = SingleFlight()
+
+# Serializes ingestion; chats keep running against the published index meanwhile
+ingest_lock = asyncio.Lock()
+# Serializes rebuilding the shared-state graph across threadpool workers
+graph_lock = threading.Lock()
+
+def build_graph(checkpoint_db=None):
+    """Import LangGraph and build the workflow; call from the threadpool, as the import can be slow"""
+    from graph.graph import create_graph
+    return create_graph(checkpoint_db)
+
+def get_graph():
+    """
+    Return the graph for the current request (runs in the threadpool).
+    In shared-state mode the graph is built on the checkpoint database all
+    workers point at, and rebuilt when another worker switches it.
+    """
+    global graph, graph_checkpoint_db
+    if SHARED_STATE and current_version() is not None:
+        checkpoint_db = active_checkpoint_db()
+        with graph_lock:
+            if graph is None or checkpoint_db != graph_checkpoint_db:
+                hold_checkpoint_db(checkpoint_db)
+                graph = build_graph(checkpoint_db)
+                # Once the graph is replaced and no request still uses it, old databases can be deleted
+                weakref.finalize(graph, release_checkpoint_db, checkpoint_db)
+                graph_checkpoint_db = checkpoint_db
+            else:
+                refresh_checkpoint_hold(checkpoint_db)
+    return graph
+
+def ingest_upload(filename: str, content: bytes):
+    """Save an uploaded PDF, build a new index version for it and publish it atomically"""
+    from graph.preprocess import build_index
+
+    with shared_ingest_lock():
+        # Cleanup old files
+        cleanup_old_files()
+        
+        # Save uploaded file
+        pdf_path = UPLOAD_DIR / filename
+        with open(pdf_path, 'wb') as f:
+            f.write(content)
+        
+        print(f"Processing PDF: {filename}")
+        # Chunks are searchable as soon as they are embedded; summaries follow in the background
+        documents, version = build_index(str(pdf_path), summaries=False)
+        publish_version(version)
+        print("Embeddings created")
+        if SHARED_STATE:
+            # A new paper starts fresh conversations on every worker
+            rotate_checkpoint_db()
+    if HIERARCHICAL_SUMMARIES:
+        start_summaries(version, documents)
+    elif PRECOMPUTE_STARTER_ANSWERS:
+        start_precompute(version)
+    # The first question about the new paper shouldn't wait for a model load
+    start_background_warmup(warm_models)
+    return documents
+
+def publish_summaries(version: str, documents):
+    """Build the summary tree for a published version and publish it as a new version.
+
+    The new version only replaces ``version`` if that is still current, so a
+    later upload or /clear-all wins. Starter answers are computed on whichever
+    version ends up live for this upload.
+    """
+    from graph.preprocess import add_summaries
+
+    with pinned_version(version) as pinned:
+        if pinned is None:
+            return
+        try:
+            summarized = add_summaries(version, documents)
+        except Exception as e:
+            print(f"Summary tree failed, keeping chunk-only version {version}: {e}")
+            summarized = None
+    if summarized is not None:
+        with shared_ingest_lock():
+            if current_version() == version:
+                publish_version(summarized)
+                version = summarized
+            else:
+                print(f"Index changed while summarizing, discarding version {summarized}")
+                discard_build(summarized)
+                return
+    if PRECOMPUTE_STARTER_ANSWERS:
+        start_precompute(version)
+
+def start_summaries(version: str, documents) -> threading.Thread:
+    """Build and publish the summary tree in a background thread"""
+    thread = threading.Thread(
+        target=publish_summaries, args=(version, documents), name=f"summaries-{version}", daemon=True
+    )
+    thread.start()
+    return thread
+
+def clear_index():
+    """Delete uploads and unpublish the index; in shared-state mode also start fresh conversations"""
+    with shared_ingest_lock():
+        cleanup_old_files()
+        # Unpublish the index; versions still used by in-flight chats are collected when they finish
+        publish_version(None)
+        if SHARED_STATE:
+            # Point every worker at a fresh database; graphs are rebuilt on the next upload
+            return rotate_checkpoint_db()
 
 @app.post("/upload-pdf", response_model=UploadResponse)
 async def upload_pdf(file: UploadFile = File(...)):
     """
     Upload a new research paper PDF.
     This will:
-    1. Delete previous uploads and embeddings
+    1. Delete previous uploads
     2. Process the new PDF
-    3. Create and store embeddings
+    3. Build embeddings into a new index version and publish it atomically
+    4. Build the summary tree in the background and publish it as a further version
+
+    Chats already in flight finish on the previous index version, which is
+    garbage-collected once no request is using it.
     """
     global graph
     
@@ -51,26 +206,13 @@ async def upload_pdf(file: UploadFile = File(...)):
         if not file.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
         
-        # Cleanup old files
-        cleanup_old_files()
-        
-        # Save uploaded file
-        pdf_path = UPLOAD_DIR / file.filename
-        with open(pdf_path, 'wb') as f:
-            content = await file.read()
-            f.write(content)
-        
-        # Preprocess PDF
-        print(f"Processing PDF: {file.filename}")
-        documents = preprocess_pdf(str(pdf_path))
-        
-        # Create embeddings
-        print("Creating embeddings...")
-        create_embeddings(documents)
-        print("Embeddings created")
-        
-        # Reinitialize graph with new checkpointer
-        graph = create_graph()
+        content = await file.read()
+        async with ingest_lock:
+            # Preprocess PDF and build the new index off the event loop
+            documents = await run_in_threadpool(ingest_upload, file.filename, content)
+            
+            # Reinitialize graph with new checkpointer
+            graph = None if SHARED_STATE else await run_in_threadpool(build_graph)
         
         return UploadResponse(
             message="PDF uploaded and processed successfully",
@@ -78,6 +220,8 @@ async def upload_pdf(file: UploadFile = File(...)):
             chunks_created=len(documents)
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -87,60 +231,135 @@ async def chat(request: ChatRequest):
     Chat with the uploaded research paper.
     Maintains conversation history using thread_id.
     """
-    global graph
+    record_traffic()
+    # Keep a local reference so a concurrent upload swapping the graph doesn't affect this request
+    current_graph = await run_in_threadpool(get_graph)
     
-    if graph is None:
+    if current_graph is None:
         raise HTTPException(
             status_code=400,
             detail="Please upload a PDF first using /upload-pdf endpoint"
         )
     
     try:
-        # Create config with thread_id
+        # Shed load before doing any work if the model queues are already past their deadline
+        check_admission(Priority.INTERACTIVE)
+        
+        return await run_chat(current_graph, request)
+    
+    except HTTPException:
+        raise
+    except SchedulerOverloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def invoke_turn(current_graph, question: str, config: dict) -> dict:
+    """
+    Invoke the graph for one turn.
+    On threads without prior history, precomputed starter answers are served
+    directly, and identical questions are coalesced: one request runs the graph
+    and the others copy its answer into their own thread.
+    """
+    snapshot = current_graph.get_state(config)
+    if snapshot.values.get("messages"):
+        return run_graph(current_graph, question, config)
+
+    index_version = config["configurable"]["index_version"]
+    starter = get_starter_answer(index_version, question)
+    if starter is not None:
+        print("Serving precomputed starter answer")
+        return record_turn(current_graph, config, question, starter["answer"], starter["documents"])
+
+    key = (index_version, normalize_question(question))
+    result, shared = chat_flight.do(key, run_graph, current_graph, question, config)
+    if shared:
+        result = record_turn(current_graph, config, question, result["messages"][-1].content, result["documents"])
+    return result
+
+def record_turn(current_graph, config: dict, question: str, answer: str, documents: list) -> dict:
+    """
+    Record a turn answered without running the graph in the thread's history.
+    documents are references ({"id", "score"}) into the pinned index version.
+    """
+    current_graph.update_state(
+        config,
+        {
+            "messages": [HumanMessage(content=question), AIMessage(content=answer)],
+            "documents": documents,
+        },
+        as_node="finalize_turn"
+    )
+    return current_graph.get_state(config).values
+
+def run_graph(current_graph, question: str, config: dict) -> dict:
+    """Run the full graph for a question on the thread in config"""
+    # Create initial state - let LangGraph load existing conversation from checkpoint
+    initial_state = {
+        "question": HumanMessage(content=question),
+        # Don't initialize messages as empty - let the checkpointer load existing conversation
+        "documents": [],
+        "on_topic": "",
+        "rephrased_question": "",
+        "proceed_to_generate": False,
+        "rephrase_count": 0
+    }
+    return current_graph.invoke(initial_state, config=config, durability=CHECKPOINT_DURABILITY)
+
+def answer_turn(current_graph, request: ChatRequest):
+    """
+    Pin the current index version and answer one turn against it.
+    Runs in the threadpool: unpinning may garbage-collect an old version and
+    formatting sources may load the index, neither of which belongs on the event loop.
+    """
+    with pinned_version() as index_version:
+        if index_version is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Please upload a PDF first using /upload-pdf endpoint"
+            )
+        
+        # Create config with thread_id and the index version this turn reads from
         config = {
             "configurable": {
-                "thread_id": request.thread_id
+                "thread_id": request.thread_id,
+                "index_version": index_version
             }
         }
+        result = invoke_turn(current_graph, request.question, config)
         
-        # Create initial state - let LangGraph load existing conversation from checkpoint
-        initial_state = {
-            "question": HumanMessage(content=request.question),
-            # Don't initialize messages as empty - let the checkpointer load existing conversation
-            "documents": [],
-            "on_topic": "",
-            "rephrased_question": "",
-            "proceed_to_generate": False,
-            "rephrase_count": 0
-        }
-        
-        # Run graph
-        result = graph.invoke(initial_state, config=config)
-        
-        # Extract answer and source documents
-        if result["messages"]:
-            answer = result["messages"][-1].content
-        else:
-            answer = "I couldn't generate an answer. Please try rephrasing your question."
-        
-        # Format source documents for response
-        source_docs = []
-        if "documents" in result and result["documents"]:
-            for i, doc in enumerate(result["documents"]):
-                source_docs.append({
-                    "chunk_id": i + 1,
-                    "content": doc.page_content,
-                    "metadata": doc.metadata if hasattr(doc, 'metadata') else {}
-                })
-        
-        return ChatResponse(
-            answer=answer,
-            thread_id=request.thread_id,
-            source_documents=source_docs
-        )
+        # Format source documents while the version is still pinned
+        source_docs = format_source_documents(str(version_path(index_version)), result.get("documents"))
+    return result, source_docs
+
+async def run_chat(current_graph, request: ChatRequest) -> ChatResponse:
+    """Run one chat turn against the current index version"""
+    # Run graph off the event loop so concurrent chats and uploads can overlap
+    result, source_docs = await run_in_threadpool(answer_turn, current_graph, request)
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Extract answer
+    if result["messages"]:
+        answer = result["messages"][-1].content
+    else:
+        answer = "I couldn't generate an answer. Please try rephrasing your question."
+    
+    return ChatResponse(
+        answer=answer,
+        thread_id=request.thread_id,
+        source_documents=source_docs
+    )
+
+@app.get("/starter-questions", response_model=StarterQuestionsResponse)
+async def starter_questions():
+    """
+    Suggested first questions for the UIs to offer.
+    Sent word for word, they are answered from the precomputed starter answers.
+    """
+    return StarterQuestionsResponse(questions=STARTER_QUESTIONS)
 
 @app.post("/new-session", response_model=NewSessionResponse)
 async def new_session():
@@ -162,13 +381,36 @@ async def new_session():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
-    """Health check endpoint"""
-    return HealthResponse(
+async def health_check(ready: bool = False):
+    """
+    Health check endpoint.
+    The server is ready once imports are warm and Ollama currently holds both
+    models in memory (always, in lazy startup mode). models_warm reports which
+    models are loaded. With ?ready=true, a server that isn't ready answers 503,
+    for use as a readiness probe, and models Ollama has evicted are reloaded in
+    the background; a probe therefore keeps the models resident even without
+    chat traffic.
+    """
+    # Queries the Ollama server, so keep it off the event loop
+    warm = await run_in_threadpool(models_warm)
+    is_ready = STARTUP_MODE == "lazy" or (imports_ready() and all(warm.values()))
+    response = HealthResponse(
         status="healthy",
-        pdf_uploaded=(EMBEDDINGS_DIR / "index.faiss").exists(),
-        graph_initialized=graph is not None
+        pdf_uploaded=current_version() is not None,
+        graph_initialized=graph is not None or (SHARED_STATE and current_version() is not None),
+        ready=is_ready,
+        models_warm=warm
     )
+    if ready and not is_ready:
+        if imports_ready():
+            start_rewarm([model for model, loaded in warm.items() if not loaded])
+        return JSONResponse(status_code=503, content=response.model_dump())
+    return response
+
+@app.get("/metrics", response_model=MetricsResponse)
+async def metrics():
+    """Queue depth and wait-time metrics for each model scheduler, and first-turn questions being coalesced"""
+    return MetricsResponse(models=scheduler_stats(), coalesced_in_flight=chat_flight.in_flight())
 
 @app.delete("/clear-all", response_model=ClearAllResponse)
 async def clear_all():
@@ -179,25 +421,31 @@ async def clear_all():
     global graph, CHECKPOINT_DB
     
     try:
-        cleanup_old_files()
-        
-        # Generate new database filename with timestamp to avoid file deletion
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        old_checkpoint_db = CHECKPOINT_DB
-        new_checkpoint_db = f"checkpoints_{timestamp}.sqlite"
+        async with ingest_lock:
+            rotated = await run_in_threadpool(clear_index)
         
-        # Update the global CHECKPOINT_DB
-        import graph.config
-        graph.config.CHECKPOINT_DB = new_checkpoint_db
-        
-        # Recreate graph with new database (this effectively clears all conversation history)
-        graph = create_graph()
+        if SHARED_STATE:
+            old_checkpoint_db, new_checkpoint_db = rotated
+            graph = None
+        else:
+            # Generate new database filename with timestamp to avoid file deletion
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            old_checkpoint_db = CHECKPOINT_DB
+            new_checkpoint_db = f"checkpoints_{timestamp}.sqlite"
+            
+            # Update the global CHECKPOINT_DB
+            import graph.config
+            graph.config.CHECKPOINT_DB = new_checkpoint_db
+            
+            # Recreate graph with new database (this effectively clears all conversation history)
+            graph = await run_in_threadpool(build_graph)
         
         return ClearAllResponse(
             message="All data cleared successfully",
             old_checkpoint_db=old_checkpoint_db,
             new_checkpoint_db=new_checkpoint_db,
-            note="Old checkpoint database file can be manually deleted later if needed"
+            note=("Old checkpoint database is deleted once no worker is using it" if SHARED_STATE
+                  else "Old checkpoint database file can be manually deleted later if needed")
         )
     
     except Exception as e:
@@ -205,4 +453,8 @@ async def clear_all():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if WORKERS > 1:
+        # Worker processes import the app by name and share index and checkpoints on disk
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
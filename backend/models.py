@@ -2,19 +2,28 @@
 Pydantic models and state definitions for the RAG application
 """
 
-from typing import List, TypedDict
+from typing import Dict, List, Optional, TypedDict
 from pydantic import BaseModel, Field
 from langchain_core.messages import BaseMessage, HumanMessage
 
+class DocumentRef(TypedDict):
+    """Reference to a document in the index version's docstore"""
+    id: str
+    score: float
+
 class AgentState(TypedDict):
-    """State definition for the LangGraph workflow"""
+    """
+    State definition for the LangGraph workflow.
+    Only messages and document references persist between turns; the other
+    fields are per-turn and reset by finalize_turn before the checkpoint.
+    """
     messages: List[BaseMessage]
-    documents: List
+    documents: List[DocumentRef]
     on_topic: str
     rephrased_question: str
     proceed_to_generate: bool
     rephrase_count: int
-    question: HumanMessage
+    question: Optional[HumanMessage]
 
 class ClassificationScore(BaseModel):
     """Binary score for relevance check"""
@@ -42,6 +51,17 @@ class HealthResponse(BaseModel):
     status: str
     pdf_uploaded: bool
     graph_initialized: bool
+    ready: bool
+    models_warm: Dict[str, bool]
+
+class MetricsResponse(BaseModel):
+    """Response model for metrics endpoint"""
+    models: Dict[str, dict]
+    coalesced_in_flight: int
+
+class StarterQuestionsResponse(BaseModel):
+    """Response model for starter questions endpoint"""
+    questions: List[str]
 
 class NewSessionResponse(BaseModel):
     """Response model for new session endpoint"""
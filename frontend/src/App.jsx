@@ -27,6 +27,7 @@ function App() {
   const [sourceDocuments, setSourceDocuments] = useState([])
   const [expandedSources, setExpandedSources] = useState({})
   const [dragOver, setDragOver] = useState(false)
+  const [starterQuestions, setStarterQuestions] = useState([])
   
   const fileInputRef = useRef(null)
   const messagesEndRef = useRef(null)
@@ -39,6 +40,13 @@ function App() {
     scrollToBottom()
   }, [messages])
 
+  useEffect(() => {
+    // Starter questions sent word for word are answered from precomputed answers
+    axios.get(`${API_BASE_URL}/starter-questions`)
+      .then(response => setStarterQuestions(response.data.questions || []))
+      .catch(error => console.error('Starter questions error:', error))
+  }, [])
+
   const handleFileUpload = async (file) => {
     if (!file || file.type !== 'application/pdf') {
       alert('Please select a PDF file')
@@ -88,17 +96,17 @@ function App() {
     setDragOver(false)
   }
 
-  const sendMessage = async () => {
-    if (!currentQuestion.trim() || isLoading) return
+  const sendMessage = async (question = currentQuestion) => {
+    if (!question.trim() || isLoading) return
 
-    const userMessage = { role: 'user', content: currentQuestion }
+    const userMessage = { role: 'user', content: question }
     setMessages(prev => [...prev, userMessage])
     setCurrentQuestion('')
     setIsLoading(true)
 
     try {
       const response = await axios.post(`${API_BASE_URL}/chat`, {
-        question: currentQuestion,
+        question: question,
         thread_id: 'react_user_1'
       }, { timeout: 60000 })
 
@@ -259,20 +267,18 @@ function App() {
               <div className="text-center py-12">
                 <MessageCircle className="w-16 h-16 text-gray-300 mx-auto mb-4" />
                 <h3 className="text-xl font-medium text-gray-700 mb-2">Ready to answer your questions!</h3>
-                <p className="text-gray-500 mb-6">Try asking about:</p>
+                <p className="text-gray-500 mb-6">Try asking:</p>
                 <div className="grid grid-cols-1 md:grid-cols-2 gap-3 max-w-2xl mx-auto text-sm">
-                  <div className="bg-white p-3 rounded-lg border border-gray-200">
-                    <span className="text-gray-700">Main findings or conclusions</span>
-                  </div>
-                  <div className="bg-white p-3 rounded-lg border border-gray-200">
-                    <span className="text-gray-700">Methodology used</span>
-                  </div>
-                  <div className="bg-white p-3 rounded-lg border border-gray-200">
-                    <span className="text-gray-700">Key concepts or definitions</span>
-                  </div>
-                  <div className="bg-white p-3 rounded-lg border border-gray-200">
-                    <span className="text-gray-700">Specific sections or data</span>
-                  </div>
+                  {starterQuestions.map((question) => (
+                    <button
+                      key={question}
+                      onClick={() => sendMessage(question)}
+                      disabled={isLoading}
+                      className="bg-white p-3 rounded-lg border border-gray-200 hover:bg-gray-50 text-left"
+                    >
+                      <span className="text-gray-700">{question}</span>
+                    </button>
+                  ))}
                 </div>
               </div>
             ) : (
@@ -325,7 +331,7 @@ function App() {
                 />
               </div>
               <button
-                onClick={sendMessage}
+                onClick={() => sendMessage()}
                 disabled={!currentQuestion.trim() || isLoading}
                 className="btn-primary flex items-center space-x-2 self-end disabled:opacity-50 disabled:cursor-not-allowed"
               >
@@ -16,6 +16,7 @@ UPLOAD_ENDPOINT = f"{API_BASE_URL}/upload-pdf"
 CHAT_ENDPOINT = f"{API_BASE_URL}/chat"
 NEW_SESSION_ENDPOINT = f"{API_BASE_URL}/new-session"
 CLEAR_ALL_ENDPOINT = f"{API_BASE_URL}/clear-all"
+STARTER_QUESTIONS_ENDPOINT = f"{API_BASE_URL}/starter-questions"
 
 # =========================
 # Helper Functions
@@ -49,6 +50,16 @@ def send_chat_message(question, thread_id="streamlit_user_1"):
     except requests.exceptions.RequestException as e:
         return False, f"Chat error: {str(e)}"
 
+def get_starter_questions():
+    """Fetch suggested first questions; sent word for word they are answered from precomputed answers"""
+    try:
+        response = requests.get(STARTER_QUESTIONS_ENDPOINT, timeout=10)
+        if response.status_code == 200:
+            return response.json().get("questions", [])
+    except requests.exceptions.RequestException:
+        pass
+    return []
+
 def start_new_session():
     """Start a new chat session"""
     try:
@@ -176,6 +187,7 @@ def main():
         st.markdown("---")
         
         # Chat messages display
+        starter_question = None
         chat_container = st.container()
         with chat_container:
             if st.session_state.messages:
@@ -188,14 +200,13 @@ def main():
                             st.markdown(message["content"])
             else:
                 st.markdown("👋 **Ready to answer your questions!**")
-                st.markdown("Try asking about:")
-                st.markdown("- Main findings or conclusions")
-                st.markdown("- Methodology used")
-                st.markdown("- Key concepts or definitions")
-                st.markdown("- Specific sections or data")
+                st.markdown("Try asking:")
+                for suggestion in get_starter_questions():
+                    if st.button(suggestion, key=f"starter_{suggestion}"):
+                        starter_question = suggestion
         
         # Chat input
-        question = st.chat_input("Ask a question about the research paper...")
+        question = st.chat_input("Ask a question about the research paper...") or starter_question
         
         if question:
             # Add user message to chat history